@@ -1,14 +1,215 @@
 import os
+import asyncio
+from functools import reduce
 from fredapi import Fred
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Callable, Optional
+from typing import List, Dict, Callable, Optional, NamedTuple
 from uuid import UUID
 
 from . import models
-from .data_collector import get_historical_data, get_fred_yield_curve, get_korean_fundamental_data, get_asset_universe
+from .data_collector import get_historical_data, get_fred_yield_curve, get_korean_fundamental_data, get_asset_universe, BENCHMARK_TICKERS
+from ._njit import njit, NUMBA_AVAILABLE
 from .portfolio_calculator import calculate_portfolio_value, calculate_returns, calculate_cumulative_returns, calculate_volatility, calculate_max_drawdown
 
+class TradeOrder(NamedTuple):
+    """A trade proposed by a strategy executor, before cash / holdings checks."""
+    symbol: str
+    type: str  # 'buy' or 'sell'
+    quantity: float
+    price: float
+
+class MomentumPriceLookup(NamedTuple):
+    """Close-price lookup tables over the union of all symbols' dates (rows) x symbols (columns)."""
+    dates: np.ndarray        # sorted datetime64[ns] union of every symbol's own dates
+    start_close: np.ndarray  # close at each symbol's first own date on/after the row date
+    has_start: np.ndarray    # whether such a date exists
+    end_close: np.ndarray    # close at each symbol's last own date on/before the row date (NaN if none)
+    symbol_to_col: Dict[str, int]
+
+def _window_rows(dates: np.ndarray, start: np.datetime64, end: np.datetime64):
+    """
+    Positions in sorted `dates` of the first date on/after `start` and the last date on/before `end`.
+    The first is len(dates) and the second -1 when no such date exists.
+    """
+    return np.searchsorted(dates, start, side='left'), np.searchsorted(dates, end, side='right') - 1
+
+def _build_momentum_price_lookup(historical_data: Dict[str, pd.DataFrame]) -> MomentumPriceLookup:
+    dates = reduce(lambda a, b: a.union(b), (pd.DatetimeIndex(df.index) for df in historical_data.values())).sort_values()
+    n_dates, n_symbols = len(dates), len(historical_data)
+    start_close = np.full((n_dates, n_symbols), np.nan)
+    end_close = np.full((n_dates, n_symbols), np.nan)
+    has_start = np.zeros((n_dates, n_symbols), dtype=bool)
+    symbol_to_col = {}
+    for j, (symbol, df) in enumerate(historical_data.items()):
+        symbol_to_col[symbol] = j
+        close = df['Close'].sort_index()
+        own_rows = dates.searchsorted(pd.DatetimeIndex(close.index))  # both sides sorted: binary search, no hash table
+        values = np.full(n_dates + 1, np.nan)  # trailing NaN slot for "no such date"
+        values[own_rows] = close.to_numpy(dtype=np.float64, na_value=np.nan)
+        marks = np.full(n_dates, -1, dtype=np.int64)
+        marks[own_rows] = own_rows
+        last_own = np.maximum.accumulate(marks)  # -1 -> NaN slot
+        marks = np.full(n_dates, n_dates, dtype=np.int64)
+        marks[own_rows] = own_rows
+        next_own = np.minimum.accumulate(marks[::-1])[::-1]  # n_dates -> NaN slot
+        start_close[:, j] = values[next_own]
+        has_start[:, j] = next_own < n_dates
+        end_close[:, j] = values[last_own]
+    return MomentumPriceLookup(dates.to_numpy(dtype='datetime64[ns]'), start_close, has_start, end_close, symbol_to_col)
+
+class _NullLog:
+    """Stands in for debug_logs when debugging is off, so log lines can append unconditionally."""
+    __slots__ = ()
+
+    def append(self, _line: str) -> None:
+        pass
+
+_NULL_LOG = _NullLog()
+
+# FRED series used as the momentum risk-free hurdle when the strategy does not specify one
+DEFAULT_RISK_FREE_TICKER = 'DGS1'
+
+# Upper bound on concurrent data-provider calls (OpenDART / FinanceDataReader rate limits)
+FETCH_CONCURRENCY = 8
+
+async def _to_thread_bounded(semaphore: asyncio.Semaphore, func: Callable, *args):
+    """Runs a blocking fetcher in a worker thread, holding `semaphore` while it runs."""
+    async with semaphore:
+        return await asyncio.to_thread(func, *args)
+
+@njit(cache=True)
+def _apply_day_transactions(sym_idx, quantities, prices, is_buy, holdings, prices_row, cash, holdings_value):
+    """
+    Applies one day's proposed trades in order (callers pass sells before buys), updating
+    `holdings` in place. A sell needs enough shares and a buy enough cash, otherwise it is skipped.
+    Returns the new cash and holdings value plus, per trade, whether it executed and the
+    cash / portfolio value right after it.
+    """
+    n = sym_idx.shape[0]
+    executed = np.zeros(n, dtype=np.bool_)
+    cash_after = np.empty(n)
+    value_after = np.empty(n)
+    for k in range(n):
+        j = sym_idx[k]
+        quantity = quantities[k]
+        if is_buy[k]:
+            cost = quantity * prices[k]
+            if cash >= cost:
+                holdings[j] += quantity
+                holdings_value += quantity * prices_row[j]
+                cash -= cost
+                executed[k] = True
+        else:
+            if holdings[j] >= quantity:
+                holdings[j] -= quantity
+                holdings_value -= quantity * prices_row[j]
+                cash += quantity * prices[k]
+                executed[k] = True
+        cash_after[k] = cash
+        value_after[k] = cash + holdings_value
+    return cash, holdings_value, executed, cash_after, value_after
+
+def _rebalance_day_mask(trading_days: pd.DatetimeIndex, frequency: Optional[str]) -> np.ndarray:
+    """True on the first trading day and on every day that starts a new month / quarter / year."""
+    if frequency == 'monthly':
+        period = trading_days.year.to_numpy() * 12 + trading_days.month.to_numpy()
+    elif frequency == 'quarterly':
+        period = trading_days.year.to_numpy() * 4 + (trading_days.month.to_numpy() - 1) // 3
+    elif frequency == 'annual':
+        period = trading_days.year.to_numpy()
+    else:
+        return np.zeros(len(trading_days), dtype=bool)
+    return np.r_[True, period[1:] != period[:-1]][:len(trading_days)]
+
+def _top_k_indices(keys: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k smallest keys in O(N) via np.argpartition. Ties at the cut-off go to the
+    earliest positions, so the selection matches a stable sort truncated to k (order is not kept).
+    """
+    if k >= keys.size:
+        return np.arange(keys.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    kth = keys[np.argpartition(keys, k - 1)[k - 1]]
+    if np.isnan(kth):
+        # NaN keys sort last, so they only fill the cut-off when fewer than k keys are valid
+        better, tied = np.nonzero(~np.isnan(keys))[0], np.nonzero(np.isnan(keys))[0]
+    else:
+        better, tied = np.nonzero(keys < kth)[0], np.nonzero(keys == kth)[0]
+    tied = tied[:k - better.size]
+    return np.concatenate((better, tied))
+
+def _floor_to_lot(quantities: np.ndarray, min_qty: np.ndarray) -> np.ndarray:
+    """Floors each quantity to a whole multiple of its minimum tradable unit; a unit <= 0 means no flooring."""
+    lot = np.where(min_qty > 0, min_qty, 1.0)
+    return np.where(min_qty > 0, np.floor_divide(quantities, lot) * lot, quantities)
+
+# Fundamental screen operators, applied element-wise over the whole universe
+_COMPARISON_UFUNCS = {'>': np.greater, '<': np.less, '>=': np.greater_equal, '<=': np.less_equal, '=': np.equal}
+
+def _fundamental_snapshot(fundamental_data_cache: Dict, codes: np.ndarray, year: int, quarter: int, metric_names: List[str]):
+    """
+    Dense (symbols x metrics) float matrix of each symbol's most recent fundamentals for the given quarter,
+    falling back to the previous quarter. Missing values are NaN; the mask marks symbols with any data.
+    """
+    prev_period = (year, quarter - 1) if quarter > 1 else (year - 1, 4)
+    fund = np.full((len(codes), len(metric_names)), np.nan)
+    has_data = np.zeros(len(codes), dtype=bool)
+    for i, code in enumerate(codes):
+        periods = fundamental_data_cache.get(code, {})
+        data = periods.get((year, quarter))
+        if data is None:
+            data = periods.get(prev_period)
+        if data is None:
+            continue
+        has_data[i] = True
+        for j, name in enumerate(metric_names):
+            value = data.get(name)
+            if value is not None:
+                fund[i, j] = value
+    return fund, has_data
+
+# Per-symbol outcome codes returned by _equal_weight_trades
+TRADE_NONE, TRADE_SKIPPED_INVALID_PRICE, TRADE_PROPOSED = 0, 1, 2
+
+@njit(cache=True)
+def _equal_weight_trades(prices, holdings, is_target, min_qty, target_value_per_asset):
+    """
+    Signed trade quantities that move each position to `target_value_per_asset` (targets) or to zero (others).
+    `prices` is 0.0 where there is no usable price. Quantities are floored to the minimum tradable unit;
+    value gaps under 0.01 are ignored. Returns the quantities and a TRADE_* status per symbol.
+    """
+    n = prices.shape[0]
+    quantities = np.zeros(n)
+    status = np.zeros(n, dtype=np.int8)
+    for k in range(n):
+        target_value = target_value_per_asset if is_target[k] else 0.0
+        value_diff = target_value - holdings[k] * prices[k]
+        if abs(value_diff) < 0.01:
+            continue
+        if prices[k] <= 0:
+            status[k] = TRADE_SKIPPED_INVALID_PRICE
+            continue
+        quantity = abs(value_diff / prices[k])
+        if min_qty[k] > 0:
+            quantity = (quantity // min_qty[k]) * min_qty[k]
+        if quantity > 0:
+            quantities[k] = quantity if value_diff > 0 else -quantity
+            status[k] = TRADE_PROPOSED
+    return quantities, status
+
+def _equal_weight_trades_np(prices, holdings, is_target, min_qty, target_value_per_asset):
+    """Vectorized equivalent of _equal_weight_trades, used when numba is absent and the loop would run as Python."""
+    value_diff = np.where(is_target, target_value_per_asset, 0.0) - holdings * prices
+    significant = np.abs(value_diff) >= 0.01
+    priced = prices > 0
+    quantity = _floor_to_lot(np.abs(value_diff / np.where(priced, prices, 1.0)), min_qty)
+    proposed = significant & priced & (quantity > 0)
+    quantities = np.where(proposed, np.where(value_diff > 0, quantity, -quantity), 0.0)
+    status = np.where(significant & ~priced, TRADE_SKIPPED_INVALID_PRICE, np.where(proposed, TRADE_PROPOSED, TRADE_NONE))
+    return quantities, status.astype(np.int8)
+
 class BacktestingEngine:
     def __init__(self, initial_capital: float = 100000000.0):
         self.initial_capital = initial_capital
@@ -16,64 +217,43 @@ class BacktestingEngine:
         self.transactions = []
         self.universe_df = None # To store asset universe for dynamic strategies
 
-    def _fetch_and_calculate_benchmarks(self, start_date: str, end_date: str, initial_capital: float, debug_logs: Optional[List[str]] = None) -> Dict[str, List[Dict]]:
+    async def _fetch_and_calculate_benchmarks(self, start_date: str, end_date: str, initial_capital: float, debug_logs: List[str] = _NULL_LOG) -> Dict[str, List[Dict]]:
         benchmark_data = {}
-        fred_api_key = os.getenv("FRED_API_KEY")
 
-        # S&P 500
-        try:
-            sp500_df = get_historical_data("S&P500", start_date, end_date)
-            if not sp500_df.empty:
-                sp500_df = sp500_df.dropna(subset=['Close']).ffill()
-                if not sp500_df.empty:
-                    sp500_df['Date'] = sp500_df.index.strftime('%Y-%m-%d')
-                    sp500_df['Value'] = (sp500_df['Close'] / sp500_df['Close'].iloc[0]) * initial_capital
-                    benchmark_data["S&P 500"] = sp500_df[['Date', 'Value']].to_dict(orient='records')
-                else:
-                    if debug_logs is not None: debug_logs.append("Warning: S&P 500 data became empty after NaN handling.")
-            else:
-                if debug_logs is not None: debug_logs.append("Warning: No historical data for S&P 500.")
-        except Exception as e:
-            if debug_logs is not None: debug_logs.append(f"Error fetching S&P 500 data: {e}")
-
-        # KOSPI (KS11)
-        try:
-            kospi_df = get_historical_data("KS11", start_date, end_date)
-            if not kospi_df.empty:
-                kospi_df = kospi_df.dropna(subset=['Close']).ffill()
-                if not kospi_df.empty:
-                    kospi_df['Date'] = kospi_df.index.strftime('%Y-%m-%d')
-                    kospi_df['Value'] = (kospi_df['Close'] / kospi_df['Close'].iloc[0]) * initial_capital
-                    benchmark_data["KOSPI"] = kospi_df[['Date', 'Value']].to_dict(orient='records')
-                else:
-                    if debug_logs is not None: debug_logs.append("Warning: KOSPI (KS11) data became empty after NaN handling.")
-            else:
-                if debug_logs is not None: debug_logs.append("Warning: No historical data for KOSPI (KS11).")
-        except Exception as e:
-            if debug_logs is not None: debug_logs.append(f"Error fetching KOSPI (KS11) data: {e}")
-
-        # Nikkei 225 (N225)
-        try:
-            nikkei_df = get_historical_data("N225", start_date, end_date)
-            if not nikkei_df.empty:
-                nikkei_df = nikkei_df.dropna(subset=['Close']).ffill()
-                if not nikkei_df.empty:
-                    nikkei_df['Date'] = nikkei_df.index.strftime('%Y-%m-%d')
-                    nikkei_df['Value'] = (nikkei_df['Close'] / nikkei_df['Close'].iloc[0]) * initial_capital
-                    benchmark_data["Nikkei 225"] = nikkei_df[['Date', 'Value']].to_dict(orient='records')
-                else:
-                    if debug_logs is not None: debug_logs.append("Warning: Nikkei 225 (N225) data became empty after NaN handling.")
-            else:
-                if debug_logs is not None: debug_logs.append("Warning: No historical data for Nikkei 225 (N225).")
-        except Exception as e:
-            if debug_logs is not None: debug_logs.append(f"Error fetching Nikkei 225 (N225) data: {e}")
+        # The three index fetches are independent network calls, so run them side by side
+        results = await asyncio.gather(
+            *(asyncio.to_thread(get_historical_data, ticker, start_date, end_date) for _, ticker, _ in BENCHMARK_TICKERS),
+            return_exceptions=True,
+        )
+
+        for (name, _, label), df in zip(BENCHMARK_TICKERS, results):
+            try:
+                if isinstance(df, Exception):
+                    raise df
+                if df.empty:
+                    debug_logs.append(f"Warning: No historical data for {label}.")
+                    continue
+                close = df['Close'].dropna()
+                if close.empty:
+                    debug_logs.append(f"Warning: {label} data became empty after NaN handling.")
+                    continue
+                values = close.to_numpy(dtype=np.float64) / close.iat[0] * initial_capital
+                # C-level datetime64 -> 'YYYY-MM-DD' cast instead of a per-element strftime
+                dates = pd.DatetimeIndex(close.index).to_numpy(dtype='datetime64[D]').astype(str).tolist()
+                benchmark_data[name] = [{'Date': d, 'Value': float(v)} for d, v in zip(dates, values)]
+            except Exception as e:
+                debug_logs.append(f"Error fetching {label} data: {e}")
 
         return benchmark_data
 
     async def run_backtest(self, strategy_details, start_date, end_date, debug: bool = False):
         debug_logs = []
+        # Parse the window bounds once; they are reused for the lookback offset and the trading-day filter
+        start_ts, end_ts = pd.Timestamp(start_date), pd.Timestamp(end_date)
         
         params = strategy_details.parameters
+        # Parameters are fixed for a backtest, so the fundamental debug header serializes them once here
+        params_json = params.model_dump_json() if debug and strategy_details.strategy_type == "fundamental_indicator" else None
         asset_weights_dict = {}
         symbols = []
 
@@ -82,7 +262,7 @@ class BacktestingEngine:
                 self.universe_df = get_asset_universe(params.fundamental_data_region)
                 if not self.universe_df.empty:
                     symbols = self.universe_df['Code'].tolist()
-                    if debug_logs is not None: debug_logs.append(f"Fundamental strategy: Loaded {len(symbols)} symbols from {params.fundamental_data_region} for universe.")
+                    debug_logs.append(f"Fundamental strategy: Loaded {len(symbols)} symbols from {params.fundamental_data_region} for universe.")
             asset_weights_dict = {} 
         else:
             if hasattr(params, 'asset_weights') and params.asset_weights:
@@ -123,213 +303,233 @@ class BacktestingEngine:
             if not fundamental_data_region:
                 return {"error": "Fundamental data region not specified for Fundamental Indicator strategy."}
 
+            if fundamental_data_region not in ("KR", "US"):
+                return {"error": f"Unsupported fundamental data region: {fundamental_data_region}"}
+
             # Determine unique year/quarter combinations within the backtest period
-            unique_periods = set()
-            for d in pd.to_datetime(pd.date_range(start=start_date, end=end_date, freq='D')):
-                year = d.year
-                quarter = (d.month - 1) // 3 + 1 # 1-4
-                unique_periods.add((year, quarter))
-            
+            # One entry per calendar quarter touched by the backtest window, in chronological order
+            unique_periods = [(p.year, p.quarter) for p in pd.period_range(start=start_date, end=end_date, freq='Q')]
+
+            # Every (symbol, period) request is independent network I/O, so issue them concurrently
+            fetch_semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+            fetch_keys = [(symbol, year, quarter) for symbol in symbols for year, quarter in unique_periods]
+            if fundamental_data_region == "KR":
+                region_label = ""
+                fetches = [_to_thread_bounded(fetch_semaphore, get_korean_fundamental_data, symbol, opendart_api_key, year, quarter, params.re_evaluation_frequency) for symbol, year, quarter in fetch_keys]
+            else:
+                region_label = "US "
+                fetches = [_to_thread_bounded(fetch_semaphore, get_us_fundamental_data, symbol, year, quarter) for symbol, year, quarter in fetch_keys]
+            fetch_results = await asyncio.gather(*fetches, return_exceptions=True)
+
             for symbol in symbols:
                 fundamental_data_cache[symbol] = {}
-                for year, quarter in unique_periods:
-                    if fundamental_data_region == "KR":
-                        try:
-                            data = get_korean_fundamental_data(symbol, opendart_api_key, year, quarter, params.re_evaluation_frequency)
-                            if data:
-                                fundamental_data_cache[symbol][(year, quarter)] = data
-                            else:
-                                if debug_logs is not None: debug_logs.append(f"Warning: No fundamental data for {symbol} in {year} Q{quarter}.")
-                        except Exception as e:
-                            if debug_logs is not None: debug_logs.append(f"Error fetching fundamental data for {symbol} in {year} Q{quarter}: {e}")
-                    elif fundamental_data_region == "US":
-                        try:
-                            data = get_us_fundamental_data(symbol, year, quarter)
-                            if data:
-                                fundamental_data_cache[symbol][(year, quarter)] = data
-                            else:
-                                if debug_logs is not None: debug_logs.append(f"Warning: No US fundamental data for {symbol} in {year} Q{quarter}.")
-                        except Exception as e:
-                            if debug_logs is not None: debug_logs.append(f"Error fetching US fundamental data for {symbol} in {year} Q{quarter}: {e}")
-                    else:
-                        return {"error": f"Unsupported fundamental data region: {fundamental_data_region}"}
+            for (symbol, year, quarter), data in zip(fetch_keys, fetch_results):
+                if isinstance(data, Exception):
+                    debug_logs.append(f"Error fetching {region_label}fundamental data for {symbol} in {year} Q{quarter}: {data}")
+                elif data:
+                    fundamental_data_cache[symbol][(year, quarter)] = data
+                else:
+                    debug_logs.append(f"Warning: No {region_label}fundamental data for {symbol} in {year} Q{quarter}.")
 
             if not fundamental_data_cache:
                 return {"error": "No fundamental data available for backtesting."}
         
-        # Fetch asset metadata globally for all symbols in the strategy
-        assets = await models.Asset.find({"symbol": {"$in": symbols}}).to_list()
-        symbol_to_asset_map = {asset.symbol: asset for asset in assets}
-        
         # Adjust data fetch start date to account for lookback periods in strategies like momentum.
         data_fetch_start_date = start_date
         if strategy_details.strategy_type == 'momentum':
             lookback_months = params.lookback_period_months or 6
             if lookback_months:
-                earliest_date = pd.to_datetime(start_date) - pd.DateOffset(months=lookback_months)
+                earliest_date = start_ts - pd.DateOffset(months=lookback_months)
                 data_fetch_start_date = earliest_date.strftime('%Y-%m-%d')
 
         historical_data = {}
         symbols_with_data = []
-        for symbol in symbols:
-            data = get_historical_data(symbol, data_fetch_start_date, end_date)
+        fetch_semaphore = asyncio.Semaphore(FETCH_CONCURRENCY)
+        # Asset metadata (only the projected fields the engine reads) is loaded while the price histories download
+        assets, fetched = await asyncio.gather(
+            models.Asset.find({"symbol": {"$in": symbols}}).project(models.AssetTradingInfo).to_list(),
+            asyncio.gather(*(_to_thread_bounded(fetch_semaphore, get_historical_data, symbol, data_fetch_start_date, end_date) for symbol in symbols)),
+        )
+        # Display name per symbol for the transaction records; symbols without an Asset show as "Unknown Asset"
+        symbol_to_name = {asset.symbol: asset.name for asset in assets}
+        # Trade-size floor per symbol, resolved once (unknown symbols or an unset value trade in whole units)
+        min_qty_by_symbol = {
+            asset.symbol: asset.minimum_tradable_quantity if asset.minimum_tradable_quantity is not None else 1.0
+            for asset in assets
+        }
+        for symbol, data in zip(symbols, fetched):
             if not data.empty:
                 historical_data[symbol] = data
                 symbols_with_data.append(symbol)
             else:
-                if debug_logs is not None: debug_logs.append(f"Warning: No historical data found for symbol {symbol} in the given date range. Skipping this symbol.")
+                debug_logs.append(f"Warning: No historical data found for symbol {symbol} in the given date range. Skipping this symbol.")
         
         symbols = symbols_with_data # Update symbols to only include those with data
         if not historical_data:
             return {"error": "No historical data available for backtesting."}
 
-        all_dates = []
-        for symbol, df in historical_data.items():
-            all_dates.extend(df.index.tolist())
-        if not all_dates:
+        # Union the per-symbol indexes in pandas rather than boxing every timestamp into a Python set
+        all_dates = reduce(lambda a, b: a.union(b), (pd.DatetimeIndex(df.index) for df in historical_data.values()))
+        if all_dates.empty:
             return {"error": "No common dates for historical data."}
 
-        trading_days = pd.to_datetime(sorted(list(set(all_dates)))).normalize()
-        trading_days = trading_days[(trading_days >= pd.to_datetime(start_date)) & (trading_days <= pd.to_datetime(end_date))]
+        trading_days = all_dates.normalize().unique().sort_values()
+        trading_days = trading_days[(trading_days >= start_ts) & (trading_days <= end_ts)]
 
-        price_data = pd.DataFrame({symbol: df['Close'] for symbol, df in historical_data.items()})
-        price_data.index = pd.to_datetime(price_data.index)
-        price_data = price_data.reindex(trading_days, method='ffill').bfill()
+        # Each day is priced at the symbol's last valid close on or before it, bars before start_date included.
+        # Nothing is back-filled: days before a symbol's first bar stay NaN, so it is never traded before it existed.
+        closes = []
+        for symbol in symbols:
+            close = historical_data[symbol]['Close'].sort_index()
+            close = close[close > 0]
+            closes.append(close.reindex(trading_days, method='ffill').to_numpy(dtype=np.float64, na_value=np.nan))
+        price_data = pd.DataFrame(np.column_stack(closes), index=trading_days, columns=symbols)
 
         if price_data.empty or price_data.isnull().all().all():
             return {"error": "Historical data is empty or contains only missing values after processing."}
 
-        current_holdings = {symbol: 0.0 for symbol in symbols}
-        current_cash = self.initial_capital
-        self.transactions = []
+        # Dense (trading_days x symbols) price matrix. The forward fill above already covers
+        # the "use the previous day's close" fallback, so each day is a single row read.
+        prices_arr = price_data[symbols].to_numpy(dtype=np.float64, na_value=np.nan)
+        # Tradable-price mask computed once for the whole matrix; invalid cells are zeroed for revaluation
+        valid_arr = np.isfinite(prices_arr) & (prices_arr > 0)
+        priced_arr = np.where(valid_arr, prices_arr, 0.0)
+        symbols_arr = np.array(symbols, dtype=object)
+
+        # Align the risk-free series to trading days once: a forward-filled reindex yields the latest rate on or before each day
+        risk_free_rates = np.zeros(len(trading_days), dtype=np.float64)
+        if strategy_details.strategy_type == "momentum":
+            risk_free_asset_ticker = params.risk_free_asset_ticker or DEFAULT_RISK_FREE_TICKER
+            try:
+                if not fred_data_df.empty and risk_free_asset_ticker in fred_data_df.columns:
+                    rates = fred_data_df[risk_free_asset_ticker].dropna()
+                    rates.index = pd.to_datetime(rates.index)
+                    # FRED data is already in decimal form
+                    risk_free_rates = rates.sort_index().reindex(trading_days, method='ffill').fillna(0.0).to_numpy(dtype=np.float64)
+            except Exception as e:
+                debug_logs.append(f"Error aligning risk-free rates from pre-fetched data, using 0.0: {e}")
 
-        last_rebalance_date = None
-        daily_portfolio_values = []
+        # Momentum reads lookback start/end closes for the whole pool as one row of these matrices per rebalance
+        momentum_lookup = _build_momentum_price_lookup(historical_data) if strategy_details.strategy_type == "momentum" else None
 
-        for date in trading_days:
-            current_prices = {}
-            for symbol in symbols:
-                price = np.nan
-                if symbol in historical_data and date in historical_data[symbol].index:
-                    price = historical_data[symbol].loc[date]['Close']
-                
-                if pd.isna(price) or price <= 0:
-                    if symbol in historical_data and not historical_data[symbol][historical_data[symbol].index < date].empty:
-                        prev_day_data = historical_data[symbol][historical_data[symbol].index < date]
-                        if not prev_day_data.empty:
-                            prev_price = prev_day_data.iloc[-1]['Close']
-                            if pd.notna(prev_price) and prev_price > 0:
-                                price = prev_price
-                
-                current_prices[symbol] = price
+        rebalance_targets = self._build_rebalance_targets(asset_weights_dict, min_qty_by_symbol) if strategy_details.strategy_type == "asset_allocation" else None
+
+        # Fundamental re-evaluation runs on the first trading day of each quarter / year, not on calendar day 1
+        rebalance_frequency = params.re_evaluation_frequency if strategy_details.strategy_type == "fundamental_indicator" else getattr(params, 'rebalancing_frequency', None)
+        rebalance_days = _rebalance_day_mask(trading_days, rebalance_frequency)
+        current_holdings = {symbol: 0.0 for symbol in symbols}
+        current_cash = self.initial_capital
+        # Holdings mirrored as an array so the portfolio can be revalued with one dot product per day
+        symbol_to_idx = {symbol: i for i, symbol in enumerate(symbols)}
+        holdings_arr = np.zeros(len(symbols))
+        # Executed trades and daily values are recorded column-wise (SoA) and turned into records once after the loop
+        txn_day, txn_symbol, txn_type, txn_quantity, txn_price, txn_cash, txn_value = [], [], [], [], [], [], []
+        daily_values = np.empty(len(trading_days), dtype=np.float64)
+
+        for i, date in enumerate(trading_days):
+            # Only symbols with a usable price today appear in current_prices, so executors need no NaN checks.
+            # Rebalancing strategies only read it on rebalance days; other days stay on the arrays alone.
+            if strategy_details.strategy_type == "buy_and_hold" or rebalance_days[i]:
+                valid = valid_arr[i]
+                current_prices = dict(zip(symbols_arr[valid].tolist(), prices_arr[i][valid].tolist()))
+            prices_row = priced_arr[i]
+            # Revalue once per day; each transaction below then adjusts this running total in O(1).
+            holdings_value = float(holdings_arr @ prices_row)
 
             daily_transactions = []
 
             if strategy_details.strategy_type == "buy_and_hold":
-                buy_hold_transactions = self._execute_buy_and_hold(asset_weights_dict, historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map)
+                buy_hold_transactions = self._execute_buy_and_hold(asset_weights_dict, historical_data, current_holdings, current_cash, current_prices, date, min_qty_by_symbol)
                 daily_transactions.extend(buy_hold_transactions)
             
             elif strategy_details.strategy_type == "asset_allocation":
-                rebalance_needed = False
-                if params.rebalancing_frequency == 'monthly':
-                    if last_rebalance_date is None or date.month != last_rebalance_date.month:
-                        rebalance_needed = True
-                elif params.rebalancing_frequency == 'quarterly':
-                    if last_rebalance_date is None or (date.month - 1) // 3 != (last_rebalance_date.month - 1) // 3:
-                        rebalance_needed = True
-                elif params.rebalancing_frequency == 'annual':
-                    if last_rebalance_date is None or date.year != last_rebalance_date.year:
-                        rebalance_needed = True
-
-                if rebalance_needed:
-                    rebalance_transactions = self._execute_rebalancing(params, asset_weights_dict, historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map, debug_logs if debug else None)
+                if rebalance_days[i]:
+                    rebalance_transactions = self._execute_rebalancing(params, rebalance_targets, historical_data, current_holdings, current_cash, current_prices, date, min_qty_by_symbol, debug_logs if debug else _NULL_LOG)
                     daily_transactions.extend(rebalance_transactions)
-                    last_rebalance_date = date
 
             elif strategy_details.strategy_type == "momentum":
-                rebalance_needed = False
-                if params.rebalancing_frequency == 'monthly':
-                    if last_rebalance_date is None or date.month != last_rebalance_date.month:
-                        rebalance_needed = True
-                # Add other frequencies if needed
-
-                if rebalance_needed:
-                    momentum_transactions = self._execute_momentum_strategy(strategy_details, historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map, fred_data_df, debug_logs if debug else None)
+                # Momentum only supports monthly rebalancing; add other frequencies to _rebalance_day_mask if needed
+                if rebalance_days[i] and params.rebalancing_frequency == 'monthly':
+                    momentum_transactions = self._execute_momentum_strategy(strategy_details, momentum_lookup, current_holdings, current_cash, current_prices, date, min_qty_by_symbol, float(risk_free_rates[i]), debug_logs if debug else _NULL_LOG)
                     daily_transactions.extend(momentum_transactions)
-                    last_rebalance_date = date
 
             elif strategy_details.strategy_type == "moving_average_crossover":
                 pass
 
             elif strategy_details.strategy_type == "fundamental_indicator":
-                fundamental_transactions = self._execute_fundamental_value_strategy(strategy_details, historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map, fundamental_data_cache, debug_logs if debug else None)
-                daily_transactions.extend(fundamental_transactions)
-
-            # Process sell transactions first to free up cash
-            sells = [t for t in daily_transactions if t['type'] == 'sell']
-            for t in sells:
-                symbol = t['symbol']
-                quantity = t['quantity']
-                price = t['price']
-                if current_holdings.get(symbol, 0) >= quantity:
-                    revenue = quantity * price
-                    current_holdings[symbol] -= quantity
-                    current_cash += revenue
-                    portfolio_value = current_cash + sum(qty * current_prices.get(s, 0) for s, qty in current_holdings.items() if s in current_prices and pd.notna(current_prices[s]))
-                    self.transactions.append({
-                        'asset': {'symbol': symbol, 'name': symbol_to_asset_map.get(symbol, models.Asset(symbol=symbol, name="Unknown Asset", asset_type="UNKNOWN")).name},
-                        'transaction_type': 'sell',
-                        'quantity': quantity,
-                        'price': price,
-                        'transaction_date': date,
-                        'cash_balance': current_cash,
-                        'portfolio_value': portfolio_value
-                    })
-                else:
-                    if debug:
-                        debug_logs.append(f"Not enough {symbol} to sell {quantity} on {date.date()}")
-
-            # Then, process buy transactions with the updated cash balance
-            buys = [t for t in daily_transactions if t['type'] == 'buy']
-            for t in buys:
-                symbol = t['symbol']
-                quantity = t['quantity']
-                price = t['price']
-                cost = quantity * price
-                if current_cash >= cost:
-                    current_holdings[symbol] += quantity
-                    current_cash -= cost
-                    portfolio_value = current_cash + sum(qty * current_prices.get(s, 0) for s, qty in current_holdings.items() if s in current_prices and pd.notna(current_prices[s]))
-                    self.transactions.append({
-                        'asset': {'symbol': symbol, 'name': symbol_to_asset_map.get(symbol, models.Asset(symbol=symbol, name="Unknown Asset", asset_type="UNKNOWN")).name},
-                        'transaction_type': 'buy',
-                        'quantity': quantity,
-                        'price': price,
-                        'transaction_date': date,
-                        'cash_balance': current_cash,
-                        'portfolio_value': portfolio_value
-                    })
-                else:
-                    if debug:
-                        debug_logs.append(f"Not enough cash to buy {quantity} of {symbol} on {date.date()}")
-
-            current_portfolio_value = current_cash + sum(qty * current_prices.get(s, 0) for s, qty in current_holdings.items() if s in current_prices and pd.notna(current_prices[s]))
-            daily_portfolio_values.append({'Date': date, 'Value': current_portfolio_value})
-
-        portfolio_value_df = pd.DataFrame(daily_portfolio_values)
-        if portfolio_value_df.empty:
+                if rebalance_days[i]:
+                    fundamental_transactions = self._execute_fundamental_value_strategy(strategy_details, historical_data, current_holdings, current_cash, current_prices, date, min_qty_by_symbol, fundamental_data_cache, debug_logs if debug else _NULL_LOG, params_json=params_json)
+                    daily_transactions.extend(fundamental_transactions)
+
+            # Sells go first to free up cash; trades on symbols without price data can never fill
+            sells, buys = [], []
+            for t in daily_transactions:
+                (buys if t.type == 'buy' else sells).append(t)
+            sells.extend(buys)
+            ordered = [t for t in sells if t.symbol in symbol_to_idx]
+            if debug and len(ordered) != len(sells):
+                for t in sells:
+                    if t.symbol not in symbol_to_idx:
+                        if t.type == 'sell':
+                            debug_logs.append(f"Not enough {t.symbol} to sell {t.quantity} on {date.date()}")
+                        else:
+                            debug_logs.append(f"Not enough cash to buy {t.quantity} of {t.symbol} on {date.date()}")
+
+            if ordered:
+                current_cash, holdings_value, executed, cash_after, value_after = _apply_day_transactions(
+                    np.array([symbol_to_idx[t.symbol] for t in ordered], dtype=np.int64),
+                    np.array([t.quantity for t in ordered], dtype=np.float64),
+                    np.array([t.price for t in ordered], dtype=np.float64),
+                    np.array([t.type == 'buy' for t in ordered], dtype=np.bool_),
+                    holdings_arr, prices_row, float(current_cash), holdings_value,
+                )
+                for k, t in enumerate(ordered):
+                    symbol = t.symbol
+                    if executed[k]:
+                        current_holdings[symbol] = float(holdings_arr[symbol_to_idx[symbol]])
+                        txn_day.append(i)
+                        txn_symbol.append(symbol)
+                        txn_type.append(t.type)
+                        txn_quantity.append(t.quantity)
+                        txn_price.append(t.price)
+                        txn_cash.append(cash_after[k])
+                        txn_value.append(value_after[k])
+                    elif debug:
+                        if t.type == 'sell':
+                            debug_logs.append(f"Not enough {symbol} to sell {t.quantity} on {date.date()}")
+                        else:
+                            debug_logs.append(f"Not enough cash to buy {t.quantity} of {symbol} on {date.date()}")
+                current_cash = float(current_cash)
+                holdings_value = float(holdings_value)
+
+            daily_values[i] = current_cash + holdings_value
+
+        self.transactions = [
+            {
+                'asset': {'symbol': symbol, 'name': symbol_to_name.get(symbol, "Unknown Asset")},
+                'transaction_type': trade_type,
+                'quantity': quantity,
+                'price': price,
+                'transaction_date': trading_days[day],
+                'cash_balance': float(cash),
+                'portfolio_value': float(value)
+            }
+            for day, symbol, trade_type, quantity, price, cash, value in zip(txn_day, txn_symbol, txn_type, txn_quantity, txn_price, txn_cash, txn_value)
+        ]
+        daily_portfolio_values = [{'Date': date, 'Value': value} for date, value in zip(trading_days, daily_values.tolist())]
+
+        if len(daily_values) == 0:
             return {"error": "No portfolio value generated."}
 
-        portfolio_value_df['Date'] = pd.to_datetime(portfolio_value_df['Date'])
-        portfolio_value_df = portfolio_value_df.set_index('Date').sort_index()
-        portfolio_value_df['FormattedDate'] = portfolio_value_df.index.strftime('%Y-%m-%d')
+        # Built straight from the value array: trading_days is already a sorted DatetimeIndex, so no parse, sort or reindexing
+        portfolio_value_df = pd.DataFrame({'Date': trading_days, 'Value': daily_values})
 
-        returns = calculate_returns(portfolio_value_df.reset_index()) if not portfolio_value_df.empty else pd.Series()
+        returns = calculate_returns(portfolio_value_df)
         cumulative_returns = calculate_cumulative_returns(returns) if not returns.empty else pd.Series()
 
         annualized_return, volatility, max_drawdown, sharpe_ratio = 0, 0, 0, 0
         if not returns.empty:
-            total_return = (portfolio_value_df['Value'].iloc[-1] / self.initial_capital) - 1
+            total_return = (daily_values[-1] / self.initial_capital) - 1
             annualized_return = (1 + total_return)**(252 / len(returns)) - 1 if len(returns) > 0 else 0
             volatility = calculate_volatility(returns, annualization_factor=252)
             max_drawdown = calculate_max_drawdown(cumulative_returns)
@@ -339,7 +539,7 @@ class BacktestingEngine:
         strategy_dict['id'] = str(strategy_details.id)
 
         # Fetch and calculate benchmark data
-        benchmark_data = self._fetch_and_calculate_benchmarks(start_date, end_date, self.initial_capital, debug_logs if debug else None)
+        benchmark_data = await self._fetch_and_calculate_benchmarks(start_date, end_date, self.initial_capital, debug_logs if debug else _NULL_LOG)
 
         return {
             "strategy": strategy_dict,
@@ -348,7 +548,7 @@ class BacktestingEngine:
             "portfolio_value": daily_portfolio_values,
             "volatility": volatility,
             "max_drawdown": max_drawdown,
-            "final_capital": current_cash + sum(current_holdings[s] * current_prices.get(s, 0) for s in current_holdings),
+            "final_capital": current_cash + sum((holdings_arr * priced_arr[-1]).tolist()),
             "transactions": self.transactions,
             "annualized_return": annualized_return,
             "sharpe_ratio": sharpe_ratio,
@@ -356,7 +556,7 @@ class BacktestingEngine:
             "benchmark_data": benchmark_data
         }
 
-    def _execute_buy_and_hold(self, asset_weights: Dict[str, float], historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map: Dict[str, any]):
+    def _execute_buy_and_hold(self, asset_weights: Dict[str, float], historical_data, current_holdings, current_cash, current_prices, date, min_qty_by_symbol: Dict[str, float]):
         transactions = []
         if all(qty == 0 for qty in current_holdings.values()) and current_cash > 0:
             total_weight = sum(asset_weights.values())
@@ -366,50 +566,71 @@ class BacktestingEngine:
             local_cash = current_cash
             initial_capital_for_weights = current_cash
 
-            for symbol, weight in asset_weights.items():
-                if symbol in current_prices and pd.notna(current_prices[symbol]) and current_prices[symbol] > 0:
-                    capital_to_allocate = initial_capital_for_weights * (weight / total_weight)
-                    min_trade_qty = symbol_to_asset_map.get(symbol, {}).minimum_tradable_quantity if symbol_to_asset_map.get(symbol) else 1.0
-                    quantity_to_buy = capital_to_allocate / current_prices[symbol]
-                    if min_trade_qty > 0:
-                        quantity_to_buy = (quantity_to_buy // min_trade_qty) * min_trade_qty
-
-                    cost = quantity_to_buy * current_prices[symbol]
-                    if quantity_to_buy > 0 and local_cash >= cost:
-                        transactions.append({
-                            'symbol': symbol,
-                            'type': 'buy',
-                            'quantity': quantity_to_buy,
-                            'price': current_prices[symbol]
-                        })
-                        local_cash -= cost
+            priced = [symbol for symbol in asset_weights if symbol in current_prices]
+            prices = np.array([current_prices[s] for s in priced], dtype=np.float64)
+            weights = np.array([asset_weights[s] for s in priced], dtype=np.float64)
+            capital_to_allocate = initial_capital_for_weights * (weights / total_weight)
+            quantities = _floor_to_lot(capital_to_allocate / prices, np.array([min_qty_by_symbol.get(s, 1.0) for s in priced], dtype=np.float64))
+
+            # The cash check stays sequential: each fill reduces what is left for the next symbol
+            for k in np.nonzero(quantities > 0)[0]:
+                cost = quantities[k] * prices[k]
+                if local_cash >= cost:
+                    transactions.append(TradeOrder(priced[k], 'buy', float(quantities[k]), current_prices[priced[k]]))
+                    local_cash -= cost
         return transactions
 
-    def _execute_rebalancing(self, strategy_params, asset_weights: Dict[str, float], historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map: Dict[str, any], debug_logs: List[str] = None):
+    def _build_rebalance_targets(self, asset_weights: Dict[str, float], min_qty_by_symbol: Dict[str, float]):
+        """Target symbols with their weight and minimum tradable quantity as aligned arrays, built once per backtest."""
+        target_symbols = list(asset_weights.keys())
+        target_w = np.array([asset_weights[s] for s in target_symbols], dtype=np.float64)
+        min_qty = np.array([min_qty_by_symbol.get(s, 1.0) for s in target_symbols], dtype=np.float64)
+        return target_symbols, target_w, min_qty
+
+    def _execute_rebalancing(self, strategy_params, rebalance_targets, historical_data, current_holdings, current_cash, current_prices, date, min_qty_by_symbol: Dict[str, float], debug_logs: List[str] = _NULL_LOG):
         transactions = []
-        target_weights = asset_weights
+        target_symbols, target_w, min_qty = rebalance_targets
         rebalancing_threshold = strategy_params.rebalancing_threshold if strategy_params.rebalancing_threshold is not None else 0.0
 
-        current_portfolio_value = current_cash + sum(current_holdings[s] * current_prices.get(s, 0) for s in current_holdings if s in current_prices and pd.notna(current_prices[s]))
+        current_portfolio_value = current_cash + sum(current_holdings[s] * current_prices[s] for s in current_holdings if s in current_prices)
         
-        if debug_logs is not None:
+        if debug_logs is not _NULL_LOG:
             debug_logs.append(f"--- Rebalancing Debug on {date.date()} ---")
             debug_logs.append(f"Portfolio Value before rebalance: {current_portfolio_value:,.0f}")
 
         if current_portfolio_value == 0:
-            if debug_logs is not None:
+            if debug_logs is not _NULL_LOG:
                 debug_logs.append("Portfolio value is 0. Skipping rebalance.")
                 debug_logs.append(f"--- End Rebalancing Debug ---")
             return transactions
 
-        current_weights = {}
-        for symbol in current_holdings:
-            if symbol in current_prices and pd.notna(current_prices[symbol]) and current_prices[symbol] > 0:
-                current_weights[symbol] = (current_holdings[symbol] * current_prices[symbol]) / current_portfolio_value
-            else:
-                current_weights[symbol] = 0.0
-        
-        if debug_logs is not None:
+        # One pass over aligned arrays: price, held quantity, value gap to target and the floored trade size per target
+        prices = np.array([current_prices.get(s, np.nan) for s in target_symbols], dtype=np.float64)
+        valid = np.isfinite(prices) & (prices > 0)
+        safe_prices = np.where(valid, prices, 1.0)
+        held_qty = np.array([current_holdings.get(s, 0) for s in target_symbols], dtype=np.float64)
+        current_value = np.where(valid, held_qty * safe_prices, 0.0)
+        target_value = current_portfolio_value * target_w
+        value_diff = target_value - current_value
+
+        # |current_w - target_w| > threshold, compared on values so no per-symbol weight division is needed
+        is_initial_buy = all(qty == 0 for qty in current_holdings.values())
+        triggered = valid & (is_initial_buy | (np.abs(value_diff) > current_portfolio_value * rebalancing_threshold))
+        if debug_logs is _NULL_LOG and not triggered.any():
+            return transactions  # Common case: every position is within its band
+
+        trade_qty = np.abs(value_diff) / safe_prices
+        floored_qty = _floor_to_lot(trade_qty, min_qty)
+        is_buy = triggered & (value_diff > 0) & (floored_qty > 0)
+        is_sell = triggered & (value_diff < 0) & (floored_qty > 0)
+
+        for k in np.nonzero(is_buy | is_sell)[0]:
+            transactions.append(TradeOrder(target_symbols[k], 'buy' if is_buy[k] else 'sell', float(floored_qty[k]), current_prices[target_symbols[k]]))
+
+        if debug_logs is not _NULL_LOG:
+            current_w = current_value / current_portfolio_value
+            deviation = np.abs(current_w - target_w)
+            current_weights = {s: (current_holdings[s] * current_prices[s]) / current_portfolio_value if s in current_prices else 0.0 for s in current_holdings}
             debug_logs.append("Current State:")
             debug_logs.append(f"  Cash: {current_cash:,.0f}")
             for s in sorted(current_holdings.keys()):
@@ -417,86 +638,47 @@ class BacktestingEngine:
                 weight = current_weights.get(s, 0.0)
                 debug_logs.append(f"  - {s}: {current_holdings.get(s, 0):.4f} shares @ {current_prices.get(s, 0):,.2f} = {val:,.0f} (Weight: {weight:.2%})")
 
-        is_initial_buy = all(qty == 0 for qty in current_holdings.values())
-
-        if debug_logs is not None:
             debug_logs.append("\nRebalancing Decisions:")
-        
-        for symbol, target_weight in target_weights.items():
-            if debug_logs is not None:
+            for k, symbol in enumerate(target_symbols):
                 debug_logs.append(f"  Checking Symbol: {symbol}")
-            if symbol not in current_prices or pd.isna(current_prices[symbol]) or current_prices[symbol] <= 0:
-                if debug_logs is not None: debug_logs.append(f"    -> Skipping: No valid price.")
-                continue
-
-            current_weight = current_weights.get(symbol, 0.0)
-            deviation = abs(current_weight - target_weight)
-            
-            if debug_logs is not None:
-                debug_logs.append(f"    - Target Weight : {target_weight:.2%}")
-                debug_logs.append(f"    - Current Weight: {current_weight:.2%}")
-                debug_logs.append(f"    - Deviation     : {deviation:.2%}")
+                if not valid[k]:
+                    debug_logs.append(f"    -> Skipping: No valid price.")
+                    continue
+                debug_logs.append(f"    - Target Weight : {target_w[k]:.2%}")
+                debug_logs.append(f"    - Current Weight: {current_w[k]:.2%}")
+                debug_logs.append(f"    - Deviation     : {deviation[k]:.2%}")
                 debug_logs.append(f"    - Threshold     : {rebalancing_threshold:.2%}")
-
-            min_trade_qty = symbol_to_asset_map.get(symbol, {}).minimum_tradable_quantity if symbol_to_asset_map.get(symbol) else 1.0
-
-            if is_initial_buy or deviation > rebalancing_threshold:
-                target_value = current_portfolio_value * target_weight
-                current_value = current_holdings.get(symbol, 0) * current_prices[symbol]
-                
-                if debug_logs is not None:
-                    debug_logs.append(f"    => REBALANCE TRIGGERED (Initial Buy: {is_initial_buy}, Deviation > Threshold: {deviation > rebalancing_threshold})")
-                    debug_logs.append(f"    - Target Value  : {target_value:,.0f}")
-                    debug_logs.append(f"    - Current Value : {current_value:,.0f}")
-
-                if target_value > current_value:
-                    amount_to_buy_value = target_value - current_value
-                    quantity_to_buy = amount_to_buy_value / current_prices[symbol]
-                    if debug_logs is not None: debug_logs.append(f"    - Action: BUY {amount_to_buy_value:,.0f} worth")
-
-                    if min_trade_qty > 0:
-                        quantity_to_buy = (quantity_to_buy // min_trade_qty) * min_trade_qty
-                    
-                    cost = quantity_to_buy * current_prices[symbol]
-                    if quantity_to_buy > 0:
-                        if debug_logs is not None: debug_logs.append(f"    - Proposing Transaction: BUY {quantity_to_buy:.4f} shares of {symbol} for {cost:,.0f}")
-                        transactions.append({'symbol': symbol, 'type': 'buy', 'quantity': quantity_to_buy, 'price': current_prices[symbol]})
-                    elif debug_logs is not None:
+                if not triggered[k]:
+                    debug_logs.append(f"    => No rebalance needed (deviation within threshold).")
+                    continue
+                debug_logs.append(f"    => REBALANCE TRIGGERED (Initial Buy: {is_initial_buy}, Deviation > Threshold: {deviation[k] > rebalancing_threshold})")
+                debug_logs.append(f"    - Target Value  : {target_value[k]:,.0f}")
+                debug_logs.append(f"    - Current Value : {current_value[k]:,.0f}")
+                if value_diff[k] > 0:
+                    debug_logs.append(f"    - Action: BUY {value_diff[k]:,.0f} worth")
+                    if is_buy[k]:
+                        debug_logs.append(f"    - Proposing Transaction: BUY {floored_qty[k]:.4f} shares of {symbol} for {floored_qty[k] * prices[k]:,.0f}")
+                    else:
                         debug_logs.append(f"    - SKIPPED proposing BUY (zero quantity)")
-
-                elif target_value < current_value:
-                    amount_to_sell_value = current_value - target_value
-                    quantity_to_sell = amount_to_sell_value / current_prices[symbol]
-                    if debug_logs is not None: debug_logs.append(f"    - Action: SELL {amount_to_sell_value:,.0f} worth")
-
-                    if min_trade_qty > 0:
-                        quantity_to_sell = (quantity_to_sell // min_trade_qty) * min_trade_qty
-
-                    if quantity_to_sell > 0:
-                        revenue = quantity_to_sell * current_prices[symbol]
-                        if debug_logs is not None: debug_logs.append(f"    - Proposing Transaction: SELL {quantity_to_sell:.4f} shares of {symbol} for {revenue:,.0f}")
-                        transactions.append({'symbol': symbol, 'type': 'sell', 'quantity': quantity_to_sell, 'price': current_prices[symbol]})
-                    elif debug_logs is not None:
+                elif value_diff[k] < 0:
+                    debug_logs.append(f"    - Action: SELL {-value_diff[k]:,.0f} worth")
+                    if is_sell[k]:
+                        debug_logs.append(f"    - Proposing Transaction: SELL {floored_qty[k]:.4f} shares of {symbol} for {floored_qty[k] * prices[k]:,.0f}")
+                    else:
                         debug_logs.append(f"    - SKIPPED SELL (Not enough shares or zero quantity)")
-            elif debug_logs is not None:
-                debug_logs.append(f"    => No rebalance needed (deviation within threshold).")
-        
-        if debug_logs is not None:
             debug_logs.append(f"--- End Rebalancing Debug ---\n")
         return transactions
 
-    def _execute_momentum_strategy(self, strategy_details, historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map: Dict[str, any], fred_data: pd.DataFrame, debug_logs: List[str] = None) -> List[Dict]:
+    def _execute_momentum_strategy(self, strategy_details, price_lookup: 'MomentumPriceLookup', current_holdings, current_cash, current_prices, date, min_qty_by_symbol: Dict[str, float], risk_free_rate_annualized: float, debug_logs: List[str] = _NULL_LOG) -> List[Dict]:
         transactions = []
         params = strategy_details.parameters
         asset_pool = params.asset_pool or []
         lookback_period_months = params.lookback_period_months or 6 # Default to 6 months
         top_n_assets = params.top_n_assets or 1 # Default to top 1 asset
 
-        risk_free_asset_ticker = params.risk_free_asset_ticker
-        if not risk_free_asset_ticker: # Handles None or empty string
-            risk_free_asset_ticker = 'DGS1'
+        risk_free_asset_ticker = params.risk_free_asset_ticker or DEFAULT_RISK_FREE_TICKER # Handles None or empty string
 
-        if debug_logs is not None:
+        if debug_logs is not _NULL_LOG:
             debug_logs.append(f"--- Momentum Strategy Debug on {date.date()} ---")
             debug_logs.append(f"  Asset Pool: {asset_pool}")
             debug_logs.append(f"  Lookback Period: {lookback_period_months} months")
@@ -504,46 +686,43 @@ class BacktestingEngine:
             debug_logs.append(f"  Risk-Free Asset: {risk_free_asset_ticker}")
 
         # 1. Calculate lookback start date
-        lookback_start_date = (date - pd.DateOffset(months=lookback_period_months)).strftime('%Y-%m-%d')
-        current_date_str = date.strftime('%Y-%m-%d')
-
-        # 2. Look up risk-free rate from pre-fetched data
-        risk_free_rate_annualized = 0.0 # Rename for clarity
-        try:
-            if not fred_data.empty and risk_free_asset_ticker in fred_data.columns:
-                rates_up_to_date = fred_data.loc[fred_data.index <= date]
-                if not rates_up_to_date.empty:
-                    latest_rate = rates_up_to_date[risk_free_asset_ticker].dropna().iloc[-1] if not rates_up_to_date[risk_free_asset_ticker].dropna().empty else 0.0
-                    risk_free_rate_annualized = latest_rate # FRED data is already in decimal form
-            if debug_logs is not None: debug_logs.append(f"  Looked up Annualized Risk-Free Rate ({risk_free_asset_ticker}) for {date.date()}: {risk_free_rate_annualized:.4f}")
-        except Exception as e:
-            if debug_logs is not None: debug_logs.append(f"  Error looking up annualized risk-free rate from pre-fetched data: {e}")
-            # Continue with risk_free_rate_annualized = 0.0 if an error occurs
+        lookback_start = np.datetime64(date.normalize() - pd.DateOffset(months=lookback_period_months), 'ns')
+        current_day = np.datetime64(date.normalize(), 'ns')
 
+        # 2. Risk-free rate comes pre-aligned to the trading day (latest FRED value on or before `date`)
         # Convert annualized risk-free rate to lookback period rate
         period_in_years = lookback_period_months / 12
         risk_free_rate = (1 + risk_free_rate_annualized)**period_in_years - 1
-        if debug_logs is not None: debug_logs.append(f"  Converted Risk-Free Rate for {lookback_period_months} months: {risk_free_rate:.4f}")
+        if debug_logs is not _NULL_LOG:
+            debug_logs.append(f"  Looked up Annualized Risk-Free Rate ({risk_free_asset_ticker}) for {date.date()}: {risk_free_rate_annualized:.4f}")
+            debug_logs.append(f"  Converted Risk-Free Rate for {lookback_period_months} months: {risk_free_rate:.4f}")
 
         # 3. Calculate returns for each asset in the pool
-        asset_returns = {}
-        for symbol in asset_pool:
-            if symbol in historical_data:
-                asset_df = historical_data[symbol]
-                # Ensure enough data for lookback period
-                if len(asset_df[asset_df.index >= lookback_start_date]) > 0:
-                    start_price = asset_df[asset_df.index >= lookback_start_date]['Close'].iloc[0]
-                    end_price = asset_df[asset_df.index <= current_date_str]['Close'].iloc[-1]
-                    if pd.notna(start_price) and pd.notna(end_price) and start_price > 0:
-                        asset_returns[symbol] = (end_price / start_price) - 1
-                    else:
-                        if debug_logs is not None: debug_logs.append(f"  Skipping {symbol}: Invalid prices for return calculation.")
-                else:
-                    if debug_logs is not None: debug_logs.append(f"  Skipping {symbol}: Not enough historical data for lookback period.")
-            else:
-                if debug_logs is not None: debug_logs.append(f"  Skipping {symbol}: No historical data available.")
-        
-        if debug_logs is not None: debug_logs.append(f"  Calculated Asset Returns: {asset_returns}")
+        pool = [symbol for symbol in dict.fromkeys(asset_pool) if symbol in price_lookup.symbol_to_col]
+        cols = np.array([price_lookup.symbol_to_col[symbol] for symbol in pool], dtype=np.int64)
+        n_dates = len(price_lookup.dates)
+        start_row, end_row = _window_rows(price_lookup.dates, lookback_start, current_day)
+
+        # Each symbol's first close on/after the lookback start and last close on/before today, for the whole pool at once
+        has_start = price_lookup.has_start[start_row, cols] if start_row < n_dates else np.zeros(len(cols), dtype=bool)
+        start_prices = price_lookup.start_close[start_row, cols] if start_row < n_dates else np.full(len(cols), np.nan)
+        end_prices = price_lookup.end_close[end_row, cols] if end_row >= 0 else np.full(len(cols), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = end_prices / start_prices - 1
+        usable = has_start & np.isfinite(start_prices) & np.isfinite(end_prices) & (start_prices > 0)
+        asset_returns = {symbol: returns[k] for k, symbol in enumerate(pool) if usable[k]}
+
+        if debug_logs is not _NULL_LOG:
+            pool_pos = {symbol: k for k, symbol in enumerate(pool)}
+            for symbol in asset_pool:
+                k = pool_pos.get(symbol)
+                if k is None:
+                    debug_logs.append(f"  Skipping {symbol}: No historical data available.")
+                elif not has_start[k]:
+                    debug_logs.append(f"  Skipping {symbol}: Not enough historical data for lookback period.")
+                elif not usable[k]:
+                    debug_logs.append(f"  Skipping {symbol}: Invalid prices for return calculation.")
+            debug_logs.append(f"  Calculated Asset Returns: {asset_returns}")
 
         # 4. Absolute Momentum Check (Risk-off)
         # If no assets have positive returns, or if top asset return is less than risk-free rate, go to cash
@@ -552,37 +731,43 @@ class BacktestingEngine:
             # Find the best performing asset
             best_asset = max(asset_returns, key=asset_returns.get)
             best_return = asset_returns[best_asset]
-            if debug_logs is not None: debug_logs.append(f"  Best Asset: {best_asset} with Return: {best_return:.2%}")
+            go_to_cash = not best_return > risk_free_rate
 
-            if best_return > risk_free_rate:
-                go_to_cash = False
-                if debug_logs is not None: debug_logs.append(f"  Absolute Momentum: POSITIVE (Best Return > Risk-Free Rate)")
+        if debug_logs is not _NULL_LOG:
+            if not asset_returns:
+                debug_logs.append(f"  No valid asset returns. Going to cash.")
             else:
-                if debug_logs is not None: debug_logs.append(f"  Absolute Momentum: NEGATIVE (Best Return <= Risk-Free Rate). Going to cash.")
-        else:
-            if debug_logs is not None: debug_logs.append(f"  No valid asset returns. Going to cash.")
+                debug_logs.append(f"  Best Asset: {best_asset} with Return: {best_return:.2%}")
+                if go_to_cash:
+                    debug_logs.append(f"  Absolute Momentum: NEGATIVE (Best Return <= Risk-Free Rate). Going to cash.")
+                else:
+                    debug_logs.append(f"  Absolute Momentum: POSITIVE (Best Return > Risk-Free Rate)")
 
         # 5. Generate Transactions based on rebalancing to target assets
         
         # Determine the target assets for this period
         target_assets = set()
         if not go_to_cash:
-            sorted_assets = sorted(asset_returns.items(), key=lambda item: item[1], reverse=True)
-            target_assets = {asset for asset, ret in sorted_assets[:top_n_assets]}
-
-        if debug_logs is not None: debug_logs.append(f"  Target assets for this period: {list(target_assets)}")
+            ranked_symbols = list(asset_returns)
+            top_idx = _top_k_indices(-np.fromiter(asset_returns.values(), dtype=np.float64, count=len(ranked_symbols)), top_n_assets)
+            target_assets = {ranked_symbols[k] for k in top_idx}
 
         current_held_assets = {symbol for symbol, quantity in current_holdings.items() if quantity > 0}
-
         # If target portfolio is the same as current, no trades are needed.
-        if target_assets == current_held_assets:
-            if debug_logs: debug_logs.append("  Target is same as holdings. No rebalancing needed.")
+        holdings_on_target = target_assets == current_held_assets
+
+        if debug_logs is not _NULL_LOG:
+            debug_logs.append(f"  Target assets for this period: {list(target_assets)}")
+            if holdings_on_target:
+                debug_logs.append("  Target is same as holdings. No rebalancing needed.")
+
+        if holdings_on_target:
             return transactions
 
         # --- Rebalancing Logic ---
         # Calculate current total portfolio value, which will be reallocated.
         current_portfolio_value = current_cash + sum(
-            qty * current_prices.get(s, 0) for s, qty in current_holdings.items() if s in current_prices and pd.notna(current_prices[s])
+            qty * current_prices[s] for s, qty in current_holdings.items() if s in current_prices
         )
 
         # Determine target value for each asset in the new portfolio.
@@ -593,137 +778,91 @@ class BacktestingEngine:
         # Generate trades by comparing current position to target position for all assets involved.
         all_involved_assets = current_held_assets.union(target_assets)
 
-        for symbol in all_involved_assets:
-            current_value = current_holdings.get(symbol, 0) * current_prices.get(symbol, 0)
-            target_value = target_value_per_asset if symbol in target_assets else 0
-            value_diff = target_value - current_value
-            
-            # Ignore negligible trades
-            if abs(value_diff) < 0.01:
-                continue
-
-            price = current_prices.get(symbol)
-            if not price or pd.isna(price) or price <= 0:
-                if debug_logs: debug_logs.append(f"  Skipping trade for {symbol} due to invalid price.")
-                continue
-
-            quantity_diff = value_diff / price
-            trade_type = 'buy' if quantity_diff > 0 else 'sell'
-            
-            min_trade_qty = symbol_to_asset_map.get(symbol, {}).minimum_tradable_quantity if symbol_to_asset_map.get(symbol) else 1.0
-            
-            abs_quantity = abs(quantity_diff)
-            if min_trade_qty > 0:
-                # Floor the quantity to the nearest tradable unit
-                abs_quantity = (abs_quantity // min_trade_qty) * min_trade_qty
-
-            if abs_quantity > 0:
-                transactions.append({
-                    'symbol': symbol,
-                    'type': trade_type,
-                    'quantity': abs_quantity,
-                    'price': price
-                })
-                if debug_logs:
-                    debug_logs.append(f"  Proposing to {trade_type.upper()} {abs_quantity:.4f} shares of {symbol}")
-
-        if debug_logs is not None:
+        # Numeric core runs in the compiled kernel; ordering follows the involved-asset set as before
+        involved = list(all_involved_assets)
+        trade_kernel = _equal_weight_trades if NUMBA_AVAILABLE else _equal_weight_trades_np
+        quantities, status = trade_kernel(
+            np.array([current_prices.get(s, 0.0) for s in involved], dtype=np.float64),
+            np.array([current_holdings.get(s, 0) for s in involved], dtype=np.float64),
+            np.array([s in target_assets for s in involved], dtype=np.bool_),
+            np.array([min_qty_by_symbol.get(s, 1.0) for s in involved], dtype=np.float64),
+            float(target_value_per_asset),
+        )
+        # Only symbols the kernel flagged need a Python-level visit
+        for k in np.flatnonzero(status == TRADE_PROPOSED):
+            symbol = involved[k]
+            transactions.append(TradeOrder(symbol, 'buy' if quantities[k] > 0 else 'sell', abs(float(quantities[k])), current_prices[symbol]))
+
+        if debug_logs is not _NULL_LOG:
+            for k in np.flatnonzero(status):
+                symbol = involved[k]
+                if status[k] == TRADE_SKIPPED_INVALID_PRICE:
+                    debug_logs.append(f"  Skipping trade for {symbol} due to invalid price.")
+                else:
+                    trade_type = 'BUY' if quantities[k] > 0 else 'SELL'
+                    debug_logs.append(f"  Proposing to {trade_type} {abs(float(quantities[k])):.4f} shares of {symbol}")
             debug_logs.append(f"--- End Momentum Strategy Debug ---\n")
         return transactions
 
-    def _execute_fundamental_value_strategy(self, strategy_details, historical_data, current_holdings, current_cash, current_prices, date, symbol_to_asset_map: Dict[str, any], fundamental_data_cache: Dict, debug_logs: List[str] = None) -> List[Dict]:
+    def _execute_fundamental_value_strategy(self, strategy_details, historical_data, current_holdings, current_cash, current_prices, date, min_qty_by_symbol: Dict[str, float], fundamental_data_cache: Dict, debug_logs: List[str] = _NULL_LOG, params_json: Optional[str] = None) -> List[Dict]:
         transactions = []
         params = strategy_details.parameters
         
-        if debug_logs is not None:
+        if debug_logs is not _NULL_LOG:
             debug_logs.append(f"--- Fundamental Value Strategy Debug on {date.date()} ---")
-            debug_logs.append(f"  Strategy Parameters: {params.model_dump_json()}")
-
-        re_evaluation_frequency = params.re_evaluation_frequency
-
-        # Determine if re-evaluation is needed
-        re_evaluate_this_period = False
-        if re_evaluation_frequency == 'annual' and date.month == 1 and date.day == 1:
-            re_evaluate_this_period = True
-        elif re_evaluation_frequency == 'quarterly' and date.day == 1 and date.month in [1, 4, 7, 10]:
-            re_evaluate_this_period = True
-        
-        if not re_evaluate_this_period:
-            return transactions
-
-        if debug_logs is not None: debug_logs.append(f"  Re-evaluation triggered for {date.date()}.")
+            debug_logs.append(f"  Strategy Parameters: {params_json if params_json is not None else params.model_dump_json()}")
+            # Only called on re-evaluation days (see rebalance_days in run_backtest)
+            debug_logs.append(f"  Re-evaluation triggered for {date.date()}.")
 
         # 1. Screen the universe
         if self.universe_df is None or self.universe_df.empty:
-            if debug_logs is not None: debug_logs.append("  Universe not loaded. Skipping evaluation.")
+            if debug_logs is not _NULL_LOG:
+                debug_logs.append("  Universe not loaded. Skipping evaluation.")
             return transactions
 
-        qualified_assets = []
         current_year = date.year
         current_quarter = (date.month - 1) // 3 + 1
 
-        for index, row in self.universe_df.iterrows():
-            symbol = row['Code']
-            
-            # Get the most recent fundamental data available
-            fundamental_data = fundamental_data_cache.get(symbol, {}).get((current_year, current_quarter))
-            if fundamental_data is None:
-                prev_quarter = current_quarter - 1
-                prev_year = current_year
-                if prev_quarter == 0:
-                    prev_quarter = 4
-                    prev_year -= 1
-                fundamental_data = fundamental_data_cache.get(symbol, {}).get((prev_year, prev_quarter))
-            
-            if fundamental_data is None:
-                continue
-
-            # Evaluate conditions
-            all_conditions_met = True
-            for condition in params.fundamental_conditions:
-                # This evaluation logic is simplified. A robust implementation would handle various metrics.
-                # For now, we assume the data exists in the fundamental_data dict.
-                value_metric_val = fundamental_data.get(condition.value_metric)
-                comparison_metric_val = 0.0
-                if condition.comparison_metric == "market_cap":
-                    comparison_metric_val = row['Marcap']
-                elif condition.comparison_metric == "constant":
-                    comparison_metric_val = 1.0
-                else:
-                    comparison_metric_val = fundamental_data.get(condition.comparison_metric)
-
-                if value_metric_val is None or comparison_metric_val is None:
-                    all_conditions_met = False
-                    break
-
-                multiplier = condition.comparison_multiplier if condition.comparison_multiplier is not None else 1.0
-                
-                op_map = {'>': lambda a, b: a > b, '<': lambda a, b: a < b, '>=': lambda a, b: a >= b, '<=': lambda a, b: a <= b, '=': lambda a, b: a == b}
-                if not op_map[condition.comparison_operator](value_metric_val, comparison_metric_val * multiplier):
-                    all_conditions_met = False
-                    break
-            
-            if all_conditions_met:
-                rank_value = 0
-                if params.ranking_metric == 'market_cap':
-                    rank_value = row['Marcap']
-                # Add other ranking metrics here
-
-                qualified_assets.append({'symbol': symbol, 'rank_value': rank_value})
+        # Screen the whole universe at once over a (symbols x metrics) snapshot instead of per-row dict lookups
+        codes = self.universe_df['Code'].to_numpy()
+        marcaps = self.universe_df['Marcap'].to_numpy(dtype=np.float64) if 'Marcap' in self.universe_df.columns else np.full(len(codes), np.nan)
+        # Lower the pydantic conditions to plain tuples once, so the screen below does no model attribute reads
+        conditions = tuple(
+            (c.value_metric, c.comparison_metric, _COMPARISON_UFUNCS[c.comparison_operator],
+             c.comparison_multiplier if c.comparison_multiplier is not None else 1.0)
+            for c in params.fundamental_conditions or []
+        )
+        ranking_metric, ranking_order, top_n = params.ranking_metric, params.ranking_order, params.top_n
+        metric_names = sorted({vm for vm, _, _, _ in conditions} | {cm for _, cm, _, _ in conditions if cm not in ("market_cap", "constant")})
+        metric_col = {name: j for j, name in enumerate(metric_names)}
+        fund, qualified = _fundamental_snapshot(fundamental_data_cache, codes, current_year, current_quarter, metric_names)
+
+        for value_metric, comparison_metric, compare, multiplier in conditions:
+            if comparison_metric == "market_cap":
+                comparison_values = marcaps
+            elif comparison_metric == "constant":
+                comparison_values = 1.0
+            else:
+                comparison_values = fund[:, metric_col[comparison_metric]]
+            # Missing metrics are NaN, and every comparison against NaN is False, so they fail the screen
+            qualified &= compare(fund[:, metric_col[value_metric]], comparison_values * multiplier)
 
-        if debug_logs is not None: debug_logs.append(f"  Found {len(qualified_assets)} assets meeting fundamental criteria.")
+        qualified_idx = np.nonzero(qualified)[0]
+        if debug_logs is not _NULL_LOG:
+            debug_logs.append(f"  Found {len(qualified_idx)} assets meeting fundamental criteria.")
 
         # 2. Rank and select Top N
-        if not qualified_assets:
+        if len(qualified_idx) == 0:
             return transactions
 
-        reverse_sort = (params.ranking_order == 'desc')
-        sorted_assets = sorted(qualified_assets, key=lambda x: x['rank_value'], reverse=reverse_sort)
-        
-        top_n = params.top_n or len(sorted_assets)
-        target_assets = {item['symbol'] for item in sorted_assets[:top_n]}
+        rank_values = marcaps[qualified_idx] if ranking_metric == 'market_cap' else np.zeros(len(qualified_idx))
+        # Add other ranking metrics here
+        top_n = top_n or len(qualified_idx)
+        top_idx = _top_k_indices(-rank_values if ranking_order == 'desc' else rank_values, top_n)
+        target_assets = set(codes[qualified_idx[top_idx]].tolist())
 
-        if debug_logs is not None: debug_logs.append(f"  Selected Top {len(target_assets)} assets: {target_assets}")
+        if debug_logs is not _NULL_LOG:
+            debug_logs.append(f"  Selected Top {len(target_assets)} assets: {target_assets}")
 
         # 3. Generate Trades
         current_held_assets = {s for s, q in current_holdings.items() if q > 0}
@@ -732,37 +871,43 @@ class BacktestingEngine:
 
         # Sell transactions
         for symbol in assets_to_sell:
-            if current_holdings[symbol] > 0 and current_prices.get(symbol) and pd.notna(current_prices[symbol]):
-                transactions.append({'symbol': symbol, 'type': 'sell', 'quantity': current_holdings[symbol], 'price': current_prices[symbol]})
-                if debug_logs is not None: debug_logs.append(f"  Proposing to SELL all {current_holdings[symbol]} shares of {symbol}")
+            if current_holdings[symbol] > 0 and symbol in current_prices:
+                transactions.append(TradeOrder(symbol, 'sell', current_holdings[symbol], current_prices[symbol]))
 
         # Buy transactions (equal weight)
         if assets_to_buy:
-            # Calculate the total portfolio value available for reallocation
-            portfolio_value_for_reallocation = current_cash + sum(current_holdings[s] * current_prices.get(s, 0) for s in current_held_assets if s in current_prices and pd.notna(current_prices[s]))
-            
-            # Exclude assets to be sold from the calculation as their value will become cash
-            value_from_sells = sum(current_holdings[s] * current_prices.get(s, 0) for s in assets_to_sell if s in current_prices and pd.notna(current_prices[s]))
+            # One pass over the held positions accumulates both the value freed by sells and the value kept.
+            # current_prices only holds valid prices, so a missing key is the only case to skip.
+            value_from_sells = value_of_continuing_assets = 0.0
+            for symbol in current_held_assets:
+                price = current_prices.get(symbol)
+                if price is None:
+                    continue
+                position_value = current_holdings[symbol] * price
+                if symbol in assets_to_sell:
+                    value_from_sells += position_value
+                elif symbol in target_assets:
+                    value_of_continuing_assets += position_value
+
+            # Sold assets become cash; the total to invest also includes the assets we continue to hold
             cash_after_sells = current_cash + value_from_sells
-
-            # The total value to be invested is the cash after sells plus the value of assets we continue to hold
-            continuing_assets = current_held_assets.intersection(target_assets)
-            value_of_continuing_assets = sum(current_holdings[s] * current_prices.get(s, 0) for s in continuing_assets if s in current_prices and pd.notna(current_prices[s]))
             total_investable_value = cash_after_sells + value_of_continuing_assets
 
             target_value_per_asset = total_investable_value / len(target_assets) if target_assets else 0
 
-            for symbol in assets_to_buy:
-                if current_prices.get(symbol) and pd.notna(current_prices[symbol]) and current_prices[symbol] > 0:
-                    quantity_to_buy = target_value_per_asset / current_prices[symbol]
-                    min_trade_qty = symbol_to_asset_map.get(symbol, {}).minimum_tradable_quantity or 1.0
-                    if min_trade_qty > 0:
-                        quantity_to_buy = (quantity_to_buy // min_trade_qty) * min_trade_qty
-
-                    if quantity_to_buy > 0:
-                        transactions.append({'symbol': symbol, 'type': 'buy', 'quantity': quantity_to_buy, 'price': current_prices[symbol]})
-                        if debug_logs is not None: debug_logs.append(f"  Proposing to BUY {quantity_to_buy:.4f} shares of {symbol}")
-
-        if debug_logs is not None:
+            buy_symbols = [symbol for symbol in assets_to_buy if symbol in current_prices]
+            buy_prices = np.array([current_prices[s] for s in buy_symbols], dtype=np.float64)
+            quantities = _floor_to_lot(target_value_per_asset / buy_prices, np.array([min_qty_by_symbol.get(s, 1.0) for s in buy_symbols], dtype=np.float64))
+            for k in np.nonzero(quantities > 0)[0]:
+                symbol, quantity_to_buy = buy_symbols[k], float(quantities[k])
+                transactions.append(TradeOrder(symbol, 'buy', quantity_to_buy, current_prices[symbol]))
+
+        if debug_logs is not _NULL_LOG:
+            # Sells were proposed before buys, so this replays the proposals in their original log order
+            for t in transactions:
+                if t.type == 'sell':
+                    debug_logs.append(f"  Proposing to SELL all {t.quantity} shares of {t.symbol}")
+                else:
+                    debug_logs.append(f"  Proposing to BUY {t.quantity:.4f} shares of {t.symbol}")
             debug_logs.append(f"--- End Fundamental Value Strategy Debug ---\n")
         return transactions
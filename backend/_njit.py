@@ -0,0 +1,21 @@
+"""
+Optional Numba support. Kernels decorated with `njit` are compiled when numba is
+installed (requirements.txt pins it) and run as plain Python otherwise, so an install
+without it still works. Uncompiled loops are slow, so callers of kernels that have a
+vectorized numpy form check NUMBA_AVAILABLE and use that form instead.
+"""
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        # Supports both bare `@njit` and `@njit(cache=True, ...)`
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
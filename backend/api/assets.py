@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 from beanie import PydanticObjectId
+from pymongo.errors import DuplicateKeyError
 from .. import models, schemas
 
 router = APIRouter(
@@ -10,21 +11,23 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.Asset)
 async def create_asset(asset: schemas.AssetCreate):
-    # Check for duplicates globally
-    db_asset = await models.Asset.find_one(models.Asset.symbol == asset.symbol)
-    if db_asset:
-        raise HTTPException(status_code=400, detail="Asset with this symbol already exists")
-
+    # Cash symbols are stored lowercase so transactions can look them up by exact match
     if asset.symbol.lower() == "cash_krw":
+        asset.symbol = "cash_krw"
         asset.name = "Korean Won Cash"
         asset.asset_type = "cash"
     elif asset.symbol.lower() == "cash_usd":
+        asset.symbol = "cash_usd"
         asset.name = "US Dollar Cash"
         asset.asset_type = "cash"
 
     asset_data = asset.dict()
     db_asset = models.Asset(**asset_data)
-    await db_asset.insert()
+    # Duplicates are rejected by the unique symbol index, so no read-before-write round trip
+    try:
+        await db_asset.insert()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Asset with this symbol already exists")
     return db_asset
 
 @router.get("/", response_model=List[schemas.Asset])
@@ -45,16 +48,14 @@ async def update_asset(asset_id: PydanticObjectId, asset: schemas.AssetCreate):
     if db_asset is None:
         raise HTTPException(status_code=404, detail="Asset not found")
     
-    # Check if the new symbol is already taken by another asset
-    if asset.symbol != db_asset.symbol:
-        existing_asset_with_symbol = await models.Asset.find_one(models.Asset.symbol == asset.symbol)
-        if existing_asset_with_symbol:
-            raise HTTPException(status_code=400, detail="Asset with this symbol already exists")
-
     update_data = asset.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_asset, key, value)
-    await db_asset.save()
+    # Renaming onto a symbol taken by another asset trips the unique symbol index
+    try:
+        await db_asset.save()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Asset with this symbol already exists")
     return db_asset
 
 @router.delete("/{asset_id}")
@@ -1,3 +1,4 @@
+import traceback
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from core.api_clients.hantoo_client import HantooClient
@@ -10,15 +11,15 @@ router = APIRouter(
 class AuthRequest(BaseModel):
     appkey: str
     appsecret: str
+    is_paper: bool = False # True for the KIS paper-trading (VPS) environment
 
 @router.post("/token")
 async def get_auth_token(request: AuthRequest):
     try:
-        result = hantoo_auth.auth(appkey=request.appkey, appsecret=request.appsecret)
-        if "error" in result:
-            raise HTTPException(status_code=400, detail=result["error"])
-        return result
+        result = HantooClient.issue_access_token(app_key=request.appkey, app_secret=request.appsecret, is_paper=request.is_paper)
     except Exception as e:
-        import traceback
         traceback.print_exc() # Print traceback to server console
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
@@ -1,10 +1,13 @@
 import os
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from fastapi import APIRouter, HTTPException, Request, Response, status
 from typing import List, Optional
 from beanie import PydanticObjectId
 from .. import models, schemas
+from ..cache import memory_cache, etag_response
 from datetime import datetime
 import json # Added this import
+import numpy as np
 import pandas as pd # Add this import
 
 router = APIRouter(
@@ -13,24 +16,24 @@ router = APIRouter(
 
 # --- Backtest Result Endpoints ---
 
-@router.post("/api/backtest_results/", status_code=status.HTTP_201_CREATED)
-async def create_backtest_result(request: schemas.BacktestSaveRequest):
-    db_strategy_doc = await models.Strategy.get(request.strategy_id)
-    if not db_strategy_doc:
-        raise HTTPException(status_code=404, detail="Strategy not found in DB for linking")
-
-    # 1. Create and insert the virtual portfolio
-    # Shorten the name to fit within 50 characters
-    portfolio_name_suffix = f"{request.name[:20]} {datetime.now().strftime('%Y%m%d%H%M%S')}"
+def _build_backtest_documents(request: schemas.BacktestSaveRequest, db_strategy_doc: models.Strategy):
+    """
+    Builds the virtual portfolio, BacktestResult and VirtualTransaction documents for one saved backtest.
+    Ids are assigned up front so the documents can reference each other before anything is inserted.
+    """
+    # Shorten the name to fit within 50 characters. Portfolio names are unique, and a bulk save can create
+    # several portfolios within the same second, so end with the id's counter bytes to keep them distinct.
+    portfolio_id = PydanticObjectId()
+    portfolio_name_suffix = f"{request.name[:20]} {datetime.now().strftime('%Y%m%d%H%M%S')} {str(portfolio_id)[-6:]}"
     virtual_portfolio = models.Portfolio(
+        id=portfolio_id,
         name=f"VP {portfolio_name_suffix}",
         environment="backtest",
         # Other portfolio details can be added if needed
     )
-    await virtual_portfolio.insert()
 
-    # 2. Create and insert the BacktestResult document
     db_result = models.BacktestResult(
+        id=PydanticObjectId(),
         name=request.name,
         virtual_portfolio_id=virtual_portfolio.id, # Link to the newly created virtual portfolio
         strategy=db_strategy_doc,
@@ -39,30 +42,21 @@ async def create_backtest_result(request: schemas.BacktestSaveRequest):
         initial_capital=request.initial_capital,
         debug_logs=request.debug_logs, # Save debug logs
     )
-    await db_result.insert()
 
-    # 3. Insert all VirtualTransactions
-    for vt_data in request.transactions_log:
-        # Ensure asset_id, portfolio_id, backtest_result_id are correctly set
-        # Unpack vt_data.model_dump() and then override portfolio_id and backtest_result_id
-        vt_data_dict = vt_data.model_dump()
-        vt_data_dict['portfolio_id'] = virtual_portfolio.id
-        vt_data_dict['backtest_result_id'] = db_result.id
-        virtual_transaction = models.VirtualTransaction(**vt_data_dict)
-        await virtual_transaction.insert()
-
-    # Explicitly convert PydanticObjectId to string for the returned ID
-    if not db_result.id:
-        raise HTTPException(status_code=500, detail="Failed to get ID for saved BacktestResult.")
-    
-    await db_result.fetch_link(models.BacktestResult.strategy) # Fetch strategy for response
+    # Override portfolio_id and backtest_result_id on each logged transaction
+    virtual_transactions = [
+        models.VirtualTransaction(**{**vt_data.model_dump(), 'portfolio_id': virtual_portfolio.id, 'backtest_result_id': db_result.id})
+        for vt_data in request.transactions_log
+    ]
+    return virtual_portfolio, db_result, virtual_transactions
 
+def _saved_result_response(db_result: models.BacktestResult, db_strategy_doc: models.Strategy) -> dict:
     # Return a dictionary representation to ensure ID is a string
     return {
         "id": str(db_result.id),
         "name": db_result.name,
         "virtual_portfolio_id": str(db_result.virtual_portfolio_id),
-        "strategy": db_result.strategy.model_dump(), # Assuming strategy is fetched
+        "strategy": db_strategy_doc.model_dump(),
         "start_date": db_result.start_date.isoformat(),
         "end_date": db_result.end_date.isoformat(),
         "initial_capital": db_result.initial_capital,
@@ -70,25 +64,67 @@ async def create_backtest_result(request: schemas.BacktestSaveRequest):
         "debug_logs": db_result.debug_logs, # Include debug logs
     }
 
+@router.post("/api/backtest_results/", status_code=status.HTTP_201_CREATED)
+async def create_backtest_result(request: schemas.BacktestSaveRequest):
+    db_strategy_doc = await models.Strategy.get(request.strategy_id)
+    if not db_strategy_doc:
+        raise HTTPException(status_code=404, detail="Strategy not found in DB for linking")
+
+    virtual_portfolio, db_result, virtual_transactions = _build_backtest_documents(request, db_strategy_doc)
+    await virtual_portfolio.insert()
+    await db_result.insert()
+    # One batched write for the whole transaction log instead of a round-trip per transaction.
+    # Ids are preassigned and rows are independent, so an unordered batch is safe.
+    if virtual_transactions:
+        await models.VirtualTransaction.insert_many(virtual_transactions, ordered=False)
+
+    return _saved_result_response(db_result, db_strategy_doc)
+
+@router.post("/api/backtest_results/bulk", status_code=status.HTTP_201_CREATED)
+async def create_backtest_results_bulk(requests: List[schemas.BacktestSaveRequest]):
+    """Saves several backtests (e.g. a parameter sweep) with one insert_many per collection."""
+    strategy_ids = list({request.strategy_id for request in requests})
+    strategies = await models.Strategy.find({"_id": {"$in": strategy_ids}}).to_list()
+    strategy_by_id = {strategy.id: strategy for strategy in strategies}
+    missing = [str(strategy_id) for strategy_id in strategy_ids if strategy_id not in strategy_by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Strategies not found in DB for linking: {', '.join(missing)}")
+
+    portfolios, results, transactions = [], [], []
+    for request in requests:
+        virtual_portfolio, db_result, virtual_transactions = _build_backtest_documents(request, strategy_by_id[request.strategy_id])
+        portfolios.append(virtual_portfolio)
+        results.append(db_result)
+        transactions.extend(virtual_transactions)
+
+    if results:
+        await models.Portfolio.insert_many(portfolios)
+        await models.BacktestResult.insert_many(results)
+    if transactions:
+        await models.VirtualTransaction.insert_many(transactions, ordered=False)
+
+    return [_saved_result_response(db_result, strategy_by_id[request.strategy_id]) for request, db_result in zip(requests, results)]
+
 @router.get("/api/backtest_results/", response_model=List[schemas.BacktestResult])
-async def read_backtest_results(skip: int = 0, limit: int = 100):
-    results_from_db = await models.BacktestResult.find_all().skip(skip).limit(limit).to_list()
-    
-    # Fetch linked strategy for each result
-    for result in results_from_db:
-        await result.fetch_link(models.BacktestResult.strategy)
-    
+async def read_backtest_results(response: Response, skip: int = 0, limit: int = 100, after_id: Optional[PydanticObjectId] = None):
+    """
+    Lists backtest results in creation (_id) order. Pass the X-Next-Cursor header of the previous page
+    as `after_id` to page by key on the _id index instead of making the server walk past `skip` documents.
+    """
+    # Linked strategies are resolved server-side ($lookup) in the same query instead of one fetch per result
+    query = models.BacktestResult.find(models.BacktestResult.id > after_id, fetch_links=True) if after_id else models.BacktestResult.find_all(fetch_links=True)
+    results_from_db = await query.sort("+_id").skip(skip).limit(limit).to_list()
+    if len(results_from_db) == limit:
+        response.headers["X-Next-Cursor"] = str(results_from_db[-1].id)
     return results_from_db
 
 @router.get("/api/backtest_results/{result_id}", response_model=schemas.BacktestResult)
 async def read_backtest_result(result_id: PydanticObjectId):
-    result = await models.BacktestResult.get(result_id)
+    # Fetch linked strategy in the same query
+    result = await models.BacktestResult.get(result_id, fetch_links=True)
     if result is None:
         raise HTTPException(status_code=404, detail="Backtest result not found")
     
-    # Fetch linked strategy
-    await result.fetch_link(models.BacktestResult.strategy)
-    
     return result
 
 @router.delete("/api/backtest_results/{result_id}")
@@ -97,52 +133,58 @@ async def delete_backtest_result(result_id: PydanticObjectId):
     if result is None:
         raise HTTPException(status_code=404, detail="Backtest result not found")
     
-    # Get virtual_portfolio_id before deleting the result
-    virtual_portfolio_id = result.virtual_portfolio_id
-
-    # Delete all associated VirtualTransactions
-    await models.VirtualTransaction.find(
-        models.VirtualTransaction.backtest_result_id == result_id
-    ).delete()
-
-    # Delete the associated VirtualPortfolio
-    portfolio = await models.Portfolio.get(virtual_portfolio_id)
-    if portfolio:
-        await portfolio.delete()
-
-    # Delete the BacktestResult itself
-    await result.delete()
+    # The associated VirtualTransactions, the VirtualPortfolio and the BacktestResult itself
+    # are independent deletes, so issue them concurrently
+    await asyncio.gather(
+        models.VirtualTransaction.find(
+            models.VirtualTransaction.backtest_result_id == result_id
+        ).delete(),
+        models.Portfolio.find_one(models.Portfolio.id == result.virtual_portfolio_id).delete(),
+        result.delete(),
+    )
     return {"message": "Backtest result and associated data deleted successfully"}
 
+async def _virtual_transactions_with_assets(backtest_result_id: PydanticObjectId) -> List[dict]:
+    """
+    Loads a backtest's virtual transactions joined with their asset in one aggregation ($lookup),
+    instead of one Asset.get per transaction. Transactions whose asset no longer exists are dropped.
+    """
+    pipeline = [
+        {"$match": {"backtest_result_id": backtest_result_id}},
+        {"$lookup": {"from": models.Asset.Settings.name, "localField": "asset_id", "foreignField": "_id", "as": "asset"}},
+        {"$unwind": "$asset"},
+        # Only the fields _format_virtual_transaction and the metrics calculation read come back over the wire
+        {"$project": {
+            "asset_id": 1, "portfolio_id": 1, "backtest_result_id": 1, "transaction_type": 1,
+            "quantity": 1, "price": 1, "fee": 1, "tax": 1, "transaction_date": 1,
+            "asset.symbol": 1, "asset.name": 1, "asset.asset_type": 1,
+        }},
+    ]
+    return await models.VirtualTransaction.aggregate(pipeline).to_list()
+
+def _format_virtual_transaction(vt: dict) -> dict:
+    return {
+        "id": str(vt["_id"]),
+        "asset_id": str(vt["asset_id"]),
+        "asset": {"symbol": vt["asset"]["symbol"], "name": vt["asset"]["name"], "asset_type": vt["asset"]["asset_type"]},
+        "transaction_type": vt["transaction_type"],
+        "quantity": vt["quantity"],
+        "price": vt["price"],
+        "fee": vt.get("fee", 0.0),
+        "tax": vt.get("tax", 0.0),
+        "transaction_date": vt["transaction_date"],
+        "portfolio_id": str(vt["portfolio_id"]),
+        "backtest_result_id": str(vt["backtest_result_id"]),
+    }
+
 @router.get("/api/backtest_results/{backtest_result_id}/transactions", response_model=List[schemas.VirtualTransaction])
 async def get_backtest_transactions(backtest_result_id: PydanticObjectId):
-    virtual_transactions = await models.VirtualTransaction.find(
-        models.VirtualTransaction.backtest_result_id == backtest_result_id
-    ).to_list()
-    
-    # Populate asset details for each transaction
-    transaction_dicts = []
-    for vt in virtual_transactions:
-        asset = await models.Asset.get(vt.asset_id)
-        if asset:
-            transaction_dicts.append({
-                "id": str(vt.id),
-                "asset_id": str(vt.asset_id),
-                "asset": {"symbol": asset.symbol, "name": asset.name, "asset_type": asset.asset_type},
-                "transaction_type": vt.transaction_type,
-                "quantity": vt.quantity,
-                "price": vt.price,
-                "fee": vt.fee,
-                "tax": vt.tax,
-                "transaction_date": vt.transaction_date,
-                "portfolio_id": str(vt.portfolio_id),
-                "backtest_result_id": str(vt.backtest_result_id),
-            })
-    return transaction_dicts
+    virtual_transactions = await _virtual_transactions_with_assets(backtest_result_id)
+    return [_format_virtual_transaction(vt) for vt in virtual_transactions]
 
 from workers.tasks import run_backtest_task
 from backend.data_collector import get_benchmark_historical_data # Import the new benchmark data function
-from backend.portfolio_calculator import calculate_portfolio_value, calculate_returns, calculate_cumulative_returns, calculate_volatility, calculate_max_drawdown # Added this import
+from backend.portfolio_calculator import calculate_portfolio_value, calculate_performance_metrics # Added this import
 
 @router.post("/api/backtest/strategy")
 async def run_strategy_backtest(request: schemas.StrategyBacktestRequest):
@@ -157,14 +199,64 @@ async def run_strategy_backtest(request: schemas.StrategyBacktestRequest):
     task = run_backtest_task.delay(
         strategy_id=str(strategy.id),
         initial_capital=request.initial_capital,
-        start_date=request.start_date,
-        end_date=request.end_date,
+        start_date=request.start_date.isoformat(), # Celery messages are JSON, so send 'YYYY-MM-DD'
+        end_date=request.end_date.isoformat(),
         debug=request.debug,
     )
 
     # Return the task ID to the client
     return {"message": "Backtest task has been received.", "task_id": task.id}
 
+def _series_to_date_dict(series: pd.Series) -> dict:
+    """{'YYYY-MM-DD': value} for a date-indexed series, formatted in one vectorized pass."""
+    if series.empty:
+        return {}
+    dates = pd.to_datetime(series.index).strftime('%Y-%m-%d')
+    return dict(zip(dates.tolist(), series.to_numpy().tolist()))
+
+def _compute_backtest_metrics(calc_transaction_dicts: List[dict], historical_prices: dict, start_date: datetime, end_date: datetime, initial_capital: float) -> dict:
+    """Portfolio value curve and performance metrics for a backtest. Pure computation, safe to run off the event loop."""
+    if not historical_prices and calc_transaction_dicts:
+        portfolio_value_df = pd.DataFrame(columns=['Date', 'Value'])
+        portfolio_value_df.loc[0] = [start_date, initial_capital]
+    else:
+        portfolio_value_df = calculate_portfolio_value(calc_transaction_dicts, historical_prices)
+
+    if portfolio_value_df.empty:
+        portfolio_value_df = pd.DataFrame(columns=['Date', 'Value'])
+        portfolio_value_df.loc[0] = [start_date, initial_capital]
+
+    # Ensure Date is string for JSON serialization (vectorized .dt.strftime instead of a per-row apply)
+    if not portfolio_value_df.empty and 'Date' in portfolio_value_df.columns:
+        if pd.api.types.is_datetime64_any_dtype(portfolio_value_df['Date']) or pd.api.types.is_object_dtype(portfolio_value_df['Date']):
+            portfolio_value_df['Date'] = pd.to_datetime(portfolio_value_df['Date'], errors='coerce').dt.strftime('%Y-%m-%d')
+
+    # Returns, cumulative returns, volatility and drawdown share one numpy pass over the Value column
+    daily_returns, cumulative_returns, volatility, max_drawdown = calculate_performance_metrics(portfolio_value_df, annualization_factor=252)
+    returns_dict = _series_to_date_dict(daily_returns)
+    cumulative_returns_dict = _series_to_date_dict(cumulative_returns)
+    sharpe_ratio = 0.0  # Placeholder
+    final_capital = portfolio_value_df['Value'].iloc[-1] if not portfolio_value_df.empty else initial_capital
+    
+    num_days = (end_date - start_date).days
+    years = num_days / 365.25 if num_days > 0 else 1
+    annualized_return = (final_capital / initial_capital) ** (1 / years) - 1 if initial_capital > 0 and years > 0 else 0
+
+    return {
+        'final_capital': final_capital,
+        'annualized_return': annualized_return,
+        'volatility': volatility,
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': sharpe_ratio,
+        # Built once from the two columns and shared by the stored document and the response
+        'portfolio_value': [
+            {'Date': d, 'Value': v}
+            for d, v in zip(portfolio_value_df['Date'].tolist(), portfolio_value_df['Value'].to_numpy(dtype=float).tolist())
+        ],
+        'returns': returns_dict,
+        'cumulative_returns': cumulative_returns_dict,
+    }
+
 @router.put("/api/backtest_results/{backtest_result_id}/calculate_and_get_details", response_model=schemas.BacktestResultDetails)
 async def calculate_and_get_backtest_details(
     backtest_result_id: PydanticObjectId,
@@ -179,71 +271,57 @@ async def calculate_and_get_backtest_details(
     if not db_result:
         raise HTTPException(status_code=404, detail="BacktestResult not found.")
 
-    # 2. Get required data from the document
-    await db_result.fetch_link(models.BacktestResult.strategy)
+    # 2-3. Load the linked strategy and the associated virtual transactions concurrently
+    _, virtual_transactions = await asyncio.gather(
+        db_result.fetch_link(models.BacktestResult.strategy),
+        _virtual_transactions_with_assets(backtest_result_id),
+    )
     strategy_doc = db_result.strategy
     start_date = db_result.start_date.strftime('%Y-%m-%d')
     end_date = db_result.end_date.strftime('%Y-%m-%d')
     initial_capital = db_result.initial_capital
     debug_logs = db_result.debug_logs
 
-    # 3. Fetch associated virtual transactions
-    virtual_transactions = await models.VirtualTransaction.find(
-        models.VirtualTransaction.backtest_result_id == backtest_result_id
-    ).to_list()
-
     # 4. Perform calculations
     # Create a simplified transaction list for the calculator function
-    calc_transaction_dicts = []
-    for vt in virtual_transactions:
-        asset = await models.Asset.get(vt.asset_id)
-        if asset:
-            calc_transaction_dicts.append({
-                "asset": {"symbol": asset.symbol},
-                "transaction_type": vt.transaction_type,
-                "quantity": vt.quantity,
-                "price": vt.price,
-                "transaction_date": vt.transaction_date,
-            })
+    calc_transaction_dicts = [
+        {
+            "asset": {"symbol": vt["asset"]["symbol"]},
+            "transaction_type": vt["transaction_type"],
+            "quantity": vt["quantity"],
+            "price": vt["price"],
+            "transaction_date": vt["transaction_date"],
+        }
+        for vt in virtual_transactions
+    ]
 
     unique_asset_symbols = list(set(t['asset']['symbol'] for t in calc_transaction_dicts))
-    historical_prices = {}
     from core.data_providers.backtest import BacktestDataContext
     data_context = BacktestDataContext()
-    for symbol in unique_asset_symbols:
-        data = data_context.get_historical_data_by_range([symbol], start_date, end_date).get(symbol)
-        if data is not None and not data.empty:
-            historical_prices[symbol] = data
-
-    if not historical_prices and calc_transaction_dicts:
-        portfolio_value_df = pd.DataFrame(columns=['Date', 'Value'])
-        portfolio_value_df.loc[0] = [datetime.strptime(start_date, '%Y-%m-%d'), initial_capital]
-    else:
-        portfolio_value_df = calculate_portfolio_value(calc_transaction_dicts, historical_prices)
-
-    if portfolio_value_df.empty:
-        portfolio_value_df = pd.DataFrame(columns=['Date', 'Value'])
-        portfolio_value_df.loc[0] = [datetime.strptime(start_date, '%Y-%m-%d'), initial_capital]
-
-    # Ensure Date is string for JSON serialization
-    if not portfolio_value_df.empty and 'Date' in portfolio_value_df.columns:
-        # Check if Date column contains datetime objects or Timestamp objects
-        if pd.api.types.is_datetime64_any_dtype(portfolio_value_df['Date']) or pd.api.types.is_object_dtype(portfolio_value_df['Date']):
-             portfolio_value_df['Date'] = portfolio_value_df['Date'].apply(lambda x: x.strftime('%Y-%m-%d') if isinstance(x, (datetime, pd.Timestamp)) else str(x))
-
-    daily_returns = calculate_returns(portfolio_value_df)
-    cumulative_returns = calculate_cumulative_returns(daily_returns)
-    returns_dict = {str(k.date()): v for k, v in daily_returns.items()} if not daily_returns.empty else {}
-    cumulative_returns_dict = {str(k.date()): v for k, v in cumulative_returns.items()} if not cumulative_returns.empty else {}
-    volatility = calculate_volatility(daily_returns, annualization_factor=252)
-    max_drawdown = calculate_max_drawdown(cumulative_returns)
-    sharpe_ratio = 0.0  # Placeholder
-    final_capital = portfolio_value_df['Value'].iloc[-1] if not portfolio_value_df.empty else initial_capital
-    
-    num_days = (db_result.end_date - db_result.start_date).days
-    years = num_days / 365.25 if num_days > 0 else 1
-    annualized_return = (final_capital / initial_capital) ** (1 / years) - 1 if initial_capital > 0 and years > 0 else 0
+    # The provider fetches one symbol per network call, so overlap those calls in worker threads
+    fetched = await asyncio.gather(*(
+        asyncio.to_thread(data_context.get_historical_data_by_range, [symbol], start_date, end_date)
+        for symbol in unique_asset_symbols
+    ))
+    historical_prices = {
+        symbol: data
+        for symbol, data in ((s, d.get(s)) for s, d in zip(unique_asset_symbols, fetched))
+        if data is not None and not data.empty
+    }
 
+    # The pandas/numpy work is CPU-bound; run it in a worker thread so it doesn't stall the event loop
+    metrics = await asyncio.to_thread(
+        _compute_backtest_metrics, calc_transaction_dicts, historical_prices,
+        db_result.start_date, db_result.end_date, initial_capital,
+    )
+    final_capital = metrics['final_capital']
+    annualized_return = metrics['annualized_return']
+    volatility = metrics['volatility']
+    max_drawdown = metrics['max_drawdown']
+    sharpe_ratio = metrics['sharpe_ratio']
+    portfolio_value_records = metrics['portfolio_value']
+    returns_dict = metrics['returns']
+    cumulative_returns_dict = metrics['cumulative_returns']
 
     # 5. Update the BacktestResult document with calculated metrics
     db_result.final_capital = final_capital
@@ -251,14 +329,15 @@ async def calculate_and_get_backtest_details(
     db_result.volatility = volatility
     db_result.max_drawdown = max_drawdown
     db_result.sharpe_ratio = sharpe_ratio
-    db_result.portfolio_value = portfolio_value_df.to_dict(orient='records')
+    db_result.portfolio_value = portfolio_value_records
     db_result.returns = returns_dict
     db_result.cumulative_returns = cumulative_returns_dict
     db_result.status = "ANALYZED"
     await db_result.save()
 
     # 6. Construct and return the detailed response
-    response_transactions = await get_backtest_transactions(backtest_result_id)
+    # The transactions were already loaded (joined with their assets) in step 3; don't query them again
+    response_transactions = [_format_virtual_transaction(vt) for vt in virtual_transactions]
 
     response_data = schemas.BacktestResultDetails(
         id=db_result.id,
@@ -274,7 +353,7 @@ async def calculate_and_get_backtest_details(
         volatility=volatility,
         max_drawdown=max_drawdown,
         sharpe_ratio=sharpe_ratio,
-        portfolio_value=portfolio_value_df.to_dict(orient='records'),
+        portfolio_value=portfolio_value_records,
         returns=returns_dict,
         cumulative_returns=cumulative_returns_dict,
         transactions=response_transactions,
@@ -311,25 +390,33 @@ async def get_backtest_task_status(task_id: str):
 
     return response
 
+@memory_cache(ttl_seconds=24 * 60 * 60)
+async def _benchmark_payload(start_date: str, end_date: str, initial_capital: float) -> dict:
+    benchmark_dfs = await get_benchmark_historical_data(start_date, end_date)
+
+    benchmark_data = {}
+    for name, df in benchmark_dfs.items():
+        if not df.empty:
+            close = df['Close'].dropna()
+            if not close.empty:
+                # Normalize on the numpy array and cast dates in C (datetime64 -> 'YYYY-MM-DD') rather than
+                # strftime per row and a DataFrame round-trip through to_dict(orient='records')
+                values = close.to_numpy(dtype=np.float64) / close.iat[0] * initial_capital
+                dates = pd.DatetimeIndex(close.index).to_numpy(dtype='datetime64[D]').astype(str).tolist()
+                benchmark_data[name] = [{'Date': d, 'Value': v} for d, v in zip(dates, values.tolist())]
+
+    return {"benchmark_data": benchmark_data}
+
 @router.get("/api/backtest/benchmarks")
 async def get_benchmarks(
+    request: Request,
     start_date: str,
     end_date: str,
     initial_capital: float
 ):
     """
     Fetches and calculates benchmark data for a given period and initial capital.
+    Daily bars change at most once a day, so payloads are memoized for 24h and served with an ETag.
     """
-    benchmark_dfs = await get_benchmark_historical_data(start_date, end_date)
-    
-    benchmark_data = {}
-    for name, df in benchmark_dfs.items():
-        if not df.empty:
-            df = df.dropna(subset=['Close']).ffill()
-            if not df.empty:
-                df['Date'] = df.index.strftime('%Y-%m-%d')
-                df['Value'] = (df['Close'] / df['Close'].iloc[0]) * initial_capital
-                benchmark_data[name] = df[['Date', 'Value']].to_dict(orient='records')
-
-    return {"benchmark_data": benchmark_data}
-
+    payload = await _benchmark_payload(start_date, end_date, initial_capital)
+    return etag_response(request, payload, max_age=60 * 60)
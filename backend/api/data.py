@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from typing import List
 from beanie import PydanticObjectId
@@ -9,9 +10,14 @@ router = APIRouter(
     tags=["data"],
 )
 
+# Upper bound on concurrent blocking provider calls from this router
+_FETCH_SEMAPHORE = asyncio.Semaphore(8)
+
 @router.get("/data/stock/{symbol}")
 async def get_stock_historical_data(symbol: str, start_date: str, end_date: str = None):
-    data = get_stock_data(symbol, start_date, end_date)
+    # get_stock_data blocks on the network; run it off the event loop, capped so bursts can't exhaust the thread pool
+    async with _FETCH_SEMAPHORE:
+        data = await asyncio.to_thread(get_stock_data, symbol, start_date, end_date)
     if data.empty:
         raise HTTPException(status_code=404, detail=f"Could not fetch data for {symbol}")
     return data.to_dict(orient="records")
@@ -1,20 +1,36 @@
 import os
-from fastapi import APIRouter, HTTPException, Query
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request
 from datetime import date
 from ..data_collector import get_fred_yield_curve # Import the new function
+from ..cache import memory_cache, etag_response
 
 router = APIRouter(
     prefix="/api/market_data",
     tags=["market_data"],
 )
 
+@memory_cache(ttl_seconds=60 * 60)
+def _yield_curve_payload(start_date: str, end_date: str) -> dict:
+    yield_curve_df = get_fred_yield_curve(start_date=start_date, end_date=end_date)
+
+    if yield_curve_df.empty:
+        return {}
+
+    # orient='index' creates a dict like {"date": {"col1": val1, ...}}
+    # The index is a DatetimeIndex, convert to string for JSON
+    yield_curve_df.index = yield_curve_df.index.strftime('%Y-%m-%d')
+    return yield_curve_df.to_dict(orient='index')
+
 @router.get("/us_yield_curve")
 async def fetch_us_yield_curve(
+    request: Request,
     start_date: date = Query(..., description="Start date in YYYY-MM-DD format"),
     end_date: date = Query(..., description="End date in YYYY-MM-DD format")
 ):
     """
     Fetches the U.S. Treasury yield curve rates from FRED for a given date range.
+    Payloads are memoized for an hour and served with an ETag.
     """
     fred_api_key = os.getenv("FRED_API_KEY")
     if not fred_api_key:
@@ -27,21 +43,11 @@ async def fetch_us_yield_curve(
         raise HTTPException(status_code=400, detail="start_date cannot be after end_date.")
         
     try:
-        yield_curve_df = get_fred_yield_curve(
-            api_key=fred_api_key,
-            start_date=start_date.strftime('%Y-%m-%d'), 
-            end_date=end_date.strftime('%Y-%m-%d')
-        )
-        
-        if yield_curve_df.empty:
-            return {}
-            
-        # orient='index' creates a dict like {"date": {"col1": val1, ...}}
-        # The index is a DatetimeIndex, convert to string for JSON
-        yield_curve_df.index = yield_curve_df.index.strftime('%Y-%m-%d')
-        return yield_curve_df.to_dict(orient='index')
-        
+        # A cache miss goes to FRED over the network; keep that off the event loop
+        payload = await asyncio.to_thread(_yield_curve_payload, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        return etag_response(request, payload, max_age=60 * 60)
+
     except Exception as e:
         # Log the exception for debugging
         print(f"Error in fetch_us_yield_curve endpoint: {e}")
-        raise HTTPException(status_code=500, detail="An internal error occurred while fetching yield curve data.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="An internal error occurred while fetching yield curve data.")
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+import asyncio
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Dict, Any, Optional, Union
 from beanie import PydanticObjectId
-from .. import models, schemas, portfolio_calculator, data_collector
+from pymongo.errors import DuplicateKeyError
+from bson import DBRef
+from .. import models, schemas, portfolio_calculator, data_collector, cache
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time
+from zoneinfo import ZoneInfo
 
 router = APIRouter(
     prefix="/api/portfolios",
@@ -12,10 +16,6 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.Portfolio)
 async def create_portfolio(portfolio: schemas.PortfolioCreate):
-    db_portfolio_with_name = await models.Portfolio.find_one(models.Portfolio.name == portfolio.name)
-    if db_portfolio_with_name:
-        raise HTTPException(status_code=400, detail="Portfolio with this name already exists")
-
     portfolio_data = portfolio.dict()
     strategy_id = portfolio_data.pop("strategy_id", None)
     
@@ -31,17 +31,34 @@ async def create_portfolio(portfolio: schemas.PortfolioCreate):
             raise HTTPException(status_code=404, detail=f"Strategy with id {strategy_id} not found")
         db_portfolio.strategy = strategy
 
-    await db_portfolio.insert()
+    # The unique index on name rejects duplicates atomically, without a separate lookup round-trip
+    try:
+        await db_portfolio.insert()
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Portfolio with this name already exists")
 
     # Fetch the link to return the full object
     await db_portfolio.fetch_link(models.Portfolio.strategy)
     
     return schemas.Portfolio.model_validate(db_portfolio)
 
-@router.get("/", response_model=List[schemas.Portfolio])
-async def read_portfolios(skip: int = 0, limit: int = 100):
-    portfolios_from_db = await models.Portfolio.find_all(fetch_links=True).skip(skip).limit(limit).to_list()
-    return [schemas.Portfolio.model_validate(p) for p in portfolios_from_db]
+@router.get("/", response_model=List[Union[schemas.Portfolio, schemas.PortfolioSummary]])
+async def read_portfolios(response: Response, skip: int = 0, limit: int = 100, after_id: Optional[PydanticObjectId] = None, expand: Optional[str] = None):
+    """
+    Lists portfolios in creation (_id) order as summaries projected server-side. Pass `expand=strategy` for the
+    full documents with their linked strategy. Pass the X-Next-Cursor header of the previous page as `after_id`
+    to page by key on the _id index instead of skipping.
+    """
+    fetch_links = expand == "strategy"
+    query = models.Portfolio.find(models.Portfolio.id > after_id, fetch_links=fetch_links) if after_id else models.Portfolio.find_all(fetch_links=fetch_links)
+    query = query.sort("+_id").skip(skip).limit(limit)
+    if fetch_links:
+        portfolios = [schemas.Portfolio.model_validate(p) for p in await query.to_list()]
+    else:
+        portfolios = await query.project(schemas.PortfolioSummary).to_list()
+    if len(portfolios) == limit:
+        response.headers["X-Next-Cursor"] = str(portfolios[-1].id)
+    return portfolios
 
 @router.get("/{portfolio_id}", response_model=schemas.Portfolio)
 async def read_portfolio(portfolio_id: PydanticObjectId):
@@ -50,6 +67,25 @@ async def read_portfolio(portfolio_id: PydanticObjectId):
         raise HTTPException(status_code=404, detail="Portfolio not found")
     return schemas.Portfolio.model_validate(portfolio)
 
+# Regular session (timezone, open, close) of the market each asset type trades in; anything else follows KRX
+_MARKET_SESSIONS = {
+    'stock_us': ('America/New_York', time(9, 30), time(16, 0)),
+}
+_DEFAULT_MARKET_SESSION = ('Asia/Seoul', time(9, 0), time(15, 30))
+
+def _price_cache_ttl(asset_type: str) -> int:
+    """Cached prices live 60s while the market is open, and until the next session opens (at most a day) otherwise."""
+    tz, open_time, close_time = _MARKET_SESSIONS.get(asset_type, _DEFAULT_MARKET_SESSION)
+    now = datetime.now(ZoneInfo(tz))
+    if now.weekday() < 5 and open_time <= now.time() < close_time:
+        return 60
+    next_open = now.replace(hour=open_time.hour, minute=open_time.minute, second=0, microsecond=0)
+    if now.time() >= open_time:
+        next_open += timedelta(days=1)
+    while next_open.weekday() >= 5:
+        next_open += timedelta(days=1)
+    return max(60, int(min((next_open - now).total_seconds(), 24 * 60 * 60)))
+
 @router.get("/{portfolio_id}/holdings")
 async def read_portfolio_holdings(portfolio_id: PydanticObjectId):
     """
@@ -60,24 +96,64 @@ async def read_portfolio_holdings(portfolio_id: PydanticObjectId):
     if portfolio is None:
         raise HTTPException(status_code=404, detail="Portfolio not found")
 
-    transactions = await models.Transaction.find(models.Transaction.portfolio_id == portfolio_id).to_list()
-    
-    # Calculate holdings (Qty, Avg Price)
-    holdings_data = portfolio_calculator.calculate_current_holdings(transactions)
+    # Calculate holdings (Qty, Avg Price) and load their assets in one server-side aggregation
+    holdings_data, asset_map = await portfolio_calculator.aggregate_current_holdings(portfolio_id)
     
     if not holdings_data:
         return []
 
-    asset_ids = list(holdings_data.keys())
-    assets = await models.Asset.find({"_id": {"$in": asset_ids}}).to_list()
-    asset_map = {a.id: a for a in assets}
-
     result = []
     
     # Pre-fetch current prices to optimize
     # We'll fetch data for the last 5 days to ensure we get a recent close price
-    end_date = datetime.now().strftime('%Y-%m-%d')
-    start_date = (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d')
+    # One clock read, so both bounds (and the price-cache day key) agree even across midnight
+    now = datetime.now()
+    end_date = now.strftime('%Y-%m-%d')
+    start_date = (now - timedelta(days=5)).strftime('%Y-%m-%d')
+
+    # US tickers are fetched together in multi-symbol yfinance requests (one round-trip per 20 symbols).
+    # Korean codes aren't Yahoo tickers, so they, and any US ticker the batch missed, go through get_stock_data.
+    # All of these calls block, so they run in worker threads and overlap instead of queueing on the event loop.
+    # Prices already cached for today (one MGET) skip the market-data fetch entirely.
+    held_assets = [asset_map[a] for a in holdings_data if a in asset_map]
+    cached_prices = await cache.get_prices([a.symbol for a in held_assets], end_date)
+    to_fetch = [a for a in held_assets if a.symbol not in cached_prices]
+    us_symbols = [a.symbol for a in to_fetch if a.asset_type == 'stock_us']
+    other_symbols = [a.symbol for a in to_fetch if a.asset_type != 'stock_us']
+    batch_prices, *other_dfs = await asyncio.gather(
+        asyncio.to_thread(data_collector.get_latest_close_prices, us_symbols, start_date, end_date),
+        *(asyncio.to_thread(data_collector.get_stock_data, s, start_date, end_date) for s in other_symbols),
+        return_exceptions=True,
+    )
+    if isinstance(batch_prices, Exception):
+        print(f"Error fetching batch prices: {batch_prices}")
+        batch_prices = {}
+    latest_prices = dict(batch_prices)
+
+    missing = [s for s in us_symbols if s not in latest_prices]
+    if missing:
+        print(f"Warning: No batch price for {', '.join(missing)}; fetching individually.")
+        missing_dfs = await asyncio.gather(
+            *(asyncio.to_thread(data_collector.get_stock_data, s, start_date, end_date) for s in missing),
+            return_exceptions=True,
+        )
+        other_symbols, other_dfs = other_symbols + missing, other_dfs + missing_dfs
+
+    for symbol, df in zip(other_symbols, other_dfs):
+        if isinstance(df, Exception):
+            print(f"Error fetching price for {symbol}: {df}")
+        elif not df.empty:
+            latest_prices[symbol] = float(df['Close'].iloc[-1])
+
+    # Fresh prices go back into the cache, with an expiry that follows each market's session
+    fresh_by_type = {}
+    for a in to_fetch:
+        if a.symbol in latest_prices:
+            fresh_by_type.setdefault(a.asset_type, {})[a.symbol] = latest_prices[a.symbol]
+    await asyncio.gather(*(
+        cache.set_prices(prices, end_date, _price_cache_ttl(asset_type)) for asset_type, prices in fresh_by_type.items()
+    ))
+    latest_prices.update(cached_prices)
     
     for asset_id, data in holdings_data.items():
         asset = asset_map.get(asset_id)
@@ -90,15 +166,7 @@ async def read_portfolio_holdings(portfolio_id: PydanticObjectId):
         
         # Fetch current price (Simplified: getting latest close from yfinance)
         # In a real system, this might come from a Redis cache or real-time provider
-        current_price = 0.0
-        try:
-            # Check asset type to decide how to fetch price if needed
-            # For now, using get_stock_data which wraps yfinance
-            df = data_collector.get_stock_data(symbol, start_date, end_date)
-            if not df.empty:
-                current_price = float(df['Close'].iloc[-1])
-        except Exception as e:
-            print(f"Error fetching price for {symbol}: {e}")
+        current_price = latest_prices.get(symbol, 0.0)
         
         # Fallback if price fetch failed or returned 0, use avg_price to avoid division errors (or keep 0)
         # current_price = current_price if current_price > 0 else avg_price 
@@ -125,28 +193,33 @@ async def read_portfolio_holdings(portfolio_id: PydanticObjectId):
 
 @router.put("/{portfolio_id}", response_model=schemas.Portfolio)
 async def update_portfolio(portfolio_id: PydanticObjectId, portfolio_update: schemas.PortfolioCreate):
-    db_portfolio = await models.Portfolio.get(portfolio_id)
-    if db_portfolio is None:
-        raise HTTPException(status_code=404, detail="Portfolio not found")
-
     update_data = portfolio_update.dict(exclude_unset=True)
 
+    # Only the provided fields are written ($set), without reading and rewriting the whole document first
+    set_data = {}
     for key, value in update_data.items():
         if key == "strategy_id":
             if value:
                 strategy = await models.Strategy.get(value)
                 if not strategy:
                     raise HTTPException(status_code=404, detail=f"Strategy with id {value} not found")
-                db_portfolio.strategy = strategy
+                # Links are stored as DBRefs
+                set_data["strategy"] = DBRef(models.Strategy.Settings.name, strategy.id)
             else:
-                db_portfolio.strategy = None
+                set_data["strategy"] = None
         else:
-            setattr(db_portfolio, key, value)
+            set_data[key] = value
 
-    await db_portfolio.save()
+    if set_data:
+        try:
+            await models.Portfolio.find_one(models.Portfolio.id == portfolio_id).update({"$set": set_data})
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Portfolio with this name already exists")
 
-    # Fetch the link to return the full object
-    await db_portfolio.fetch_link(models.Portfolio.strategy)
+    # Read back with the strategy link resolved to return the full object
+    db_portfolio = await models.Portfolio.get(portfolio_id, fetch_links=True)
+    if db_portfolio is None:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
 
     return schemas.Portfolio.model_validate(db_portfolio)
 
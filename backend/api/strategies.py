@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Response, status
+from typing import List, Optional
 from beanie import PydanticObjectId
 from .. import models, schemas
 
@@ -18,17 +18,14 @@ async def create_strategy(strategy: schemas.StrategyCreate):
     return schemas.Strategy.model_validate(db_strategy)
 
 @router.get("/", response_model=List[schemas.Strategy])
-async def read_strategies(skip: int = 0, limit: int = 100):
-    strategies_from_db = await models.Strategy.find_all().skip(skip).limit(limit).to_list()
-    # Manually serialize to dictionaries and convert ObjectId to string
-    serialized_strategies = []
-    for s in strategies_from_db:
-        strategy_data = s.model_dump()
-        strategy_data['id'] = str(s.id) # Ensure id is a string
-        # The created_at is already a datetime object, Pydantic will handle it.
-        # The parameters are already a dict.
-        serialized_strategies.append(strategy_data)
-    return serialized_strategies
+async def read_strategies(response: Response, skip: int = 0, limit: int = 100, after_id: Optional[PydanticObjectId] = None):
+    """Lists strategies in creation (_id) order. Pass the X-Next-Cursor header of the previous page as `after_id`."""
+    query = models.Strategy.find(models.Strategy.id > after_id) if after_id else models.Strategy.find_all()
+    strategies_from_db = await query.sort("+_id").skip(skip).limit(limit).to_list()
+    if len(strategies_from_db) == limit:
+        response.headers["X-Next-Cursor"] = str(strategies_from_db[-1].id)
+    # response_model serializes the documents (ObjectId -> str included) in a single pass
+    return strategies_from_db
 
 @router.get("/{strategy_id}", response_model=schemas.Strategy)
 async def read_strategy(strategy_id: PydanticObjectId):
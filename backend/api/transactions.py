@@ -1,106 +1,141 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from beanie import PydanticObjectId
 from datetime import datetime, timedelta
 from .. import models, schemas
 from ..database import get_client
-from core.api_clients.hantoo_client import HantooClient
-import re
+from core.api_clients.hantoo_client import get_hantoo_client
+import asyncio
+import traceback
+import orjson
 
 router = APIRouter(
     prefix="/api/transactions",
     tags=["transactions"],
 )
 
-@router.post("/", response_model=schemas.Transaction)
-async def create_transaction(transaction: schemas.TransactionCreate):
-    # Manually start a session
+# Canonical (lowercase) symbol of the cash asset for each settlement currency, as stored by create_asset
+_CASH_SYMBOL = {"USD": "cash_usd", "KRW": "cash_krw"}
+
+async def _insert_atomically(documents: List[models.Transaction]) -> None:
+    """
+    Writes the documents all-or-nothing. A single document is atomic by itself, so the multi-document
+    transaction (and its session) is only paid for when there is more than one to write.
+    """
+    if len(documents) == 1:
+        await documents[0].insert()
+        return
     db_client = get_client() # Get the client at runtime
     async with await db_client.start_session() as session:
-        # Start a transaction
+        # The transaction is aborted automatically if the insert raises
         async with session.start_transaction():
-            try:
-                # 1. Fetch the linked documents
-                db_asset = await models.Asset.get(transaction.asset_id, session=session)
-                if not db_asset:
-                    raise HTTPException(status_code=404, detail="Asset not found")
-
-                db_portfolio = await models.Portfolio.get(transaction.portfolio_id, session=session)
-                if not db_portfolio:
-                    raise HTTPException(status_code=404, detail="Portfolio not found")
-
-                # 2. Prepare and insert the primary transaction
-                transaction_data = transaction.dict()
-                db_transaction = models.Transaction(**transaction_data)
-                await db_transaction.insert(session=session)
-
-                # 3. Automatic cash transaction logic
-                if db_transaction.transaction_type in ['buy', 'sell']:
-                    currency = None
-                    if db_asset.asset_type == 'stock_us':
-                        currency = 'USD'
-                    elif db_asset.asset_type.startswith('stock_kr'):
-                        currency = 'KRW'
-
-                    if currency:
-                        cash_symbol_pattern = re.compile(f"cash_{currency.lower()}", re.IGNORECASE)
-                        cash_asset = await models.Asset.find_one(
-                            models.Asset.asset_type == 'cash',
-                            models.Asset.symbol == cash_symbol_pattern,
-                            session=session
-                        )
-                        if not cash_asset:
-                            raise HTTPException(status_code=400, detail=f"Cash asset for currency {currency} not found in this portfolio. Please add it first.")
-
-                        # Calculate cash amount
-                        cash_amount = db_transaction.quantity * db_transaction.price
-                        cash_transaction_type = ''
-                        final_cash_amount = 0.0
-
-                        if db_transaction.transaction_type == 'buy':
-                            cash_transaction_type = 'withdrawal'
-                            final_cash_amount = cash_amount + db_transaction.fee
-                        elif db_transaction.transaction_type == 'sell':
-                            cash_transaction_type = 'deposit'
-                            final_cash_amount = cash_amount - db_transaction.fee - db_transaction.tax
-
-                        # Create and insert the cash transaction
-                        cash_transaction_data = {
-                            'asset_id': cash_asset.id,
-                            'portfolio_id': db_portfolio.id,
-                            'transaction_type': cash_transaction_type,
-                            'quantity': final_cash_amount,
-                            'price': 1, # Price for cash is always 1
-                            'transaction_date': db_transaction.transaction_date,
-                            'fee': 0, # Fee is already accounted for
-                            'tax': 0, # Tax is already accounted for
-                        }
-                        db_cash_transaction = models.Transaction(**cash_transaction_data)
-                        await db_cash_transaction.insert(session=session)
-
-                return db_transaction
-
-            except HTTPException as e:
-                # The transaction will be aborted automatically by the 'async with' block
-                # re-raising the exception.
-                raise e
-            except Exception as e:
-                # Any other unexpected error will also abort the transaction.
-                import traceback
-                traceback.print_exc() # Print traceback to server console
-                raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/", response_model=List[schemas.Transaction])
-async def read_transactions(portfolio_id: Optional[PydanticObjectId] = None, skip: int = 0, limit: int = 100):
+            await models.Transaction.insert_many(documents, session=session)
+
+@router.post("/", response_model=schemas.Transaction)
+async def create_transaction(transaction: schemas.TransactionCreate):
+    try:
+        # 1. Fetch the linked documents (reads only; nothing is written until everything is validated)
+        db_asset = await models.Asset.get(transaction.asset_id)
+        if not db_asset:
+            raise HTTPException(status_code=404, detail="Asset not found")
+
+        db_portfolio = await models.Portfolio.get(transaction.portfolio_id)
+        if not db_portfolio:
+            raise HTTPException(status_code=404, detail="Portfolio not found")
+
+        # 2. Prepare the primary transaction (written together with its cash leg below)
+        transaction_data = transaction.dict()
+        db_transaction = models.Transaction(id=PydanticObjectId(), **transaction_data)
+        documents = [db_transaction]
+
+        # 3. Automatic cash transaction logic
+        if db_transaction.transaction_type in ['buy', 'sell']:
+            currency = None
+            if db_asset.asset_type == 'stock_us':
+                currency = 'USD'
+            elif db_asset.asset_type.startswith('stock_kr'):
+                currency = 'KRW'
+
+            if currency:
+                # Equality on the uniquely indexed symbol: an index seek instead of a regex scan
+                cash_asset = await models.Asset.find_one(
+                    models.Asset.asset_type == 'cash',
+                    models.Asset.symbol == _CASH_SYMBOL[currency],
+                )
+                if not cash_asset:
+                    raise HTTPException(status_code=400, detail=f"Cash asset for currency {currency} not found in this portfolio. Please add it first.")
+
+                # Calculate cash amount
+                cash_amount = db_transaction.quantity * db_transaction.price
+                cash_transaction_type = ''
+                final_cash_amount = 0.0
+
+                if db_transaction.transaction_type == 'buy':
+                    cash_transaction_type = 'withdrawal'
+                    final_cash_amount = cash_amount + db_transaction.fee
+                elif db_transaction.transaction_type == 'sell':
+                    cash_transaction_type = 'deposit'
+                    final_cash_amount = cash_amount - db_transaction.fee - db_transaction.tax
+
+                # Create the cash transaction
+                cash_transaction_data = {
+                    'asset_id': cash_asset.id,
+                    'portfolio_id': db_portfolio.id,
+                    'transaction_type': cash_transaction_type,
+                    'quantity': final_cash_amount,
+                    'price': 1, # Price for cash is always 1
+                    'transaction_date': db_transaction.transaction_date,
+                    'fee': 0, # Fee is already accounted for
+                    'tax': 0, # Tax is already accounted for
+                }
+                documents.append(models.Transaction(**cash_transaction_data))
+
+        # The transaction and its cash leg are written together, or not at all
+        await _insert_atomically(documents)
+        return db_transaction
+
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        traceback.print_exc() # Print traceback to server console
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Streamed, so FastAPI does not validate against a response_model; `responses` keeps the schema in the docs
+@router.get("/", response_class=StreamingResponse, responses={200: {"model": List[schemas.Transaction]}})
+async def read_transactions(portfolio_id: Optional[PydanticObjectId] = None, skip: int = 0, limit: int = 100, after_id: Optional[PydanticObjectId] = None):
+    """
+    Lists transactions in creation (_id) order, streamed row by row straight from the cursor so memory
+    stays flat for large pages. To page, pass the id of the last row as `after_id`.
+    """
+    filters = []
     if portfolio_id:
-        query = models.Transaction.find(
-            models.Transaction.portfolio_id == portfolio_id
-        )
-    else:
-        query = models.Transaction.find_all()
+        filters.append(models.Transaction.portfolio_id == portfolio_id)
+    if after_id:
+        filters.append(models.Transaction.id > after_id)
+    rows = models.Transaction.find(*filters).sort("+_id").skip(skip).limit(limit).__aiter__()
+
+    # Read the first row before the 200 goes out, so a failing query still answers with a 500.
+    # A failure later in the stream propagates and leaves the body visibly truncated, never a short valid page.
+    try:
+        first = await rows.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    def encode(db_transaction) -> bytes:
+        # Same shape as schemas.Transaction, encoded per row with orjson
+        return orjson.dumps(schemas.Transaction.model_validate(db_transaction).model_dump(mode="json"))
+
+    async def stream_rows():
+        if first is None:
+            yield b"[]"
+            return
+        yield b"[" + encode(first)
+        async for db_transaction in rows:
+            yield b"," + encode(db_transaction)
+        yield b"]"
 
-    transactions_from_db = await query.skip(skip).limit(limit).to_list()
-    return transactions_from_db
+    return StreamingResponse(stream_rows(), media_type="application/json")
 
 
 @router.get("/fetch-broker-transactions/{portfolio_id}", tags=["transactions"])
@@ -130,18 +165,15 @@ async def fetch_broker_transactions(
         start_date = (datetime.now() - timedelta(days=7)).strftime('%Y%m%d')
 
     try:
-        client = HantooClient(
-            broker_provider=db_portfolio.broker_provider,
-            broker_account_no=db_portfolio.broker_account_no
-        )
-        transactions = client.get_transaction_history(start_date=start_date, end_date=end_date)
+        client = get_hantoo_client(db_portfolio.broker_provider, db_portfolio.broker_account_no)
+        # The broker API is called with blocking requests; keep it off the event loop
+        transactions = await asyncio.to_thread(client.get_transaction_history, start_date=start_date, end_date=end_date)
         return transactions
     except ValueError as e:
         # Handles cases like invalid credentials from HantooClient __init__
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # Handles other exceptions, e.g., from requests within the client
-        import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to fetch transactions from broker: {e}")
 
@@ -182,70 +214,83 @@ async def delete_transaction(transaction_id: PydanticObjectId):
 
 @router.post("/batch", response_model=List[schemas.Transaction])
 async def create_multiple_transactions(transactions: List[schemas.TransactionCreate]):
-    db_client = get_client()
-    created_transactions = []
-    async with await db_client.start_session() as session:
-        async with session.start_transaction():
-            for transaction in transactions:
-                try:
-                    # This logic is duplicated from create_transaction. 
-                    # For long-term maintenance, consider refactoring into a shared function.
-                    db_asset = await models.Asset.get(transaction.asset_id, session=session)
-                    if not db_asset:
-                        raise HTTPException(status_code=404, detail=f"Asset {transaction.asset_id} not found")
-
-                    db_portfolio = await models.Portfolio.get(transaction.portfolio_id, session=session)
-                    if not db_portfolio:
-                        raise HTTPException(status_code=404, detail=f"Portfolio {transaction.portfolio_id} not found")
-
-                    transaction_data = transaction.dict()
-                    db_transaction = models.Transaction(**transaction_data)
-                    await db_transaction.insert(session=session)
-                    created_transactions.append(db_transaction)
-
-                    # Automatic cash transaction logic
-                    if db_transaction.transaction_type in ['buy', 'sell']:
-                        currency = None
-                        if db_asset.asset_type == 'stock_us':
-                            currency = 'USD'
-                        elif db_asset.asset_type.startswith('stock_kr'):
-                            currency = 'KRW'
-
-                        if currency:
-                            cash_symbol_pattern = re.compile(f"cash_{currency.lower()}", re.IGNORECASE)
-                            cash_asset = await models.Asset.find_one(
-                                models.Asset.asset_type == 'cash',
-                                models.Asset.symbol == cash_symbol_pattern,
-                                session=session
-                            )
-                            if not cash_asset:
-                                raise HTTPException(status_code=400, detail=f"Cash asset for currency {currency} not found in portfolio {db_portfolio.name}. Please add it first.")
-
-                            cash_amount = db_transaction.quantity * db_transaction.price
-                            cash_transaction_type = 'withdrawal' if db_transaction.transaction_type == 'buy' else 'deposit'
-                            final_cash_amount = 0
-
-                            if db_transaction.transaction_type == 'buy':
-                                final_cash_amount = cash_amount + db_transaction.fee
-                            else: # sell
-                                final_cash_amount = cash_amount - db_transaction.fee - db_transaction.tax
-
-                            cash_transaction_data = {
-                                'asset_id': cash_asset.id,
-                                'portfolio_id': db_portfolio.id,
-                                'transaction_type': cash_transaction_type,
-                                'quantity': final_cash_amount,
-                                'price': 1,
-                                'transaction_date': db_transaction.transaction_date,
-                                'fee': 0,
-                                'tax': 0,
-                            }
-                            db_cash_transaction = models.Transaction(**cash_transaction_data)
-                            await db_cash_transaction.insert(session=session)
-
-                except Exception as e:
-                    # Abort transaction and re-raise for any other unexpected error
-                    await session.abort_transaction()
-                    raise HTTPException(status_code=500, detail=f"An unexpected error occurred during batch creation: {e}")
-
-    return created_transactions
\ No newline at end of file
+    try:
+        # Load every referenced asset and portfolio, and the cash assets, up front in three queries
+        # instead of three lookups per transaction
+        asset_ids = list({t.asset_id for t in transactions})
+        portfolio_ids = list({t.portfolio_id for t in transactions})
+        assets = await models.Asset.find({"_id": {"$in": asset_ids}}).to_list()
+        portfolios = await models.Portfolio.find({"_id": {"$in": portfolio_ids}}).to_list()
+        asset_map = {a.id: a for a in assets}
+        portfolio_map = {p.id: p for p in portfolios}
+
+        cash_assets = await models.Asset.find(
+            models.Asset.asset_type == 'cash',
+            {"symbol": {"$in": list(_CASH_SYMBOL.values())}},
+        ).to_list()
+        cash_asset_by_symbol = {a.symbol: a for a in cash_assets}
+        cash_asset_by_currency = {
+            currency: cash_asset_by_symbol[symbol] for currency, symbol in _CASH_SYMBOL.items() if symbol in cash_asset_by_symbol
+        }
+
+        # Build the transactions and their automatic cash legs in memory, then write them in one batch.
+        # Ids are assigned here so the created documents can be returned.
+        created_transactions = []
+        documents = []
+        for transaction in transactions:
+            db_asset = asset_map.get(transaction.asset_id)
+            if not db_asset:
+                raise HTTPException(status_code=404, detail=f"Asset {transaction.asset_id} not found")
+
+            db_portfolio = portfolio_map.get(transaction.portfolio_id)
+            if not db_portfolio:
+                raise HTTPException(status_code=404, detail=f"Portfolio {transaction.portfolio_id} not found")
+
+            db_transaction = models.Transaction(id=PydanticObjectId(), **transaction.dict())
+            documents.append(db_transaction)
+            created_transactions.append(db_transaction)
+
+            # Automatic cash transaction logic
+            if db_transaction.transaction_type in ['buy', 'sell']:
+                currency = None
+                if db_asset.asset_type == 'stock_us':
+                    currency = 'USD'
+                elif db_asset.asset_type.startswith('stock_kr'):
+                    currency = 'KRW'
+
+                if currency:
+                    cash_asset = cash_asset_by_currency.get(currency)
+                    if not cash_asset:
+                        raise HTTPException(status_code=400, detail=f"Cash asset for currency {currency} not found in portfolio {db_portfolio.name}. Please add it first.")
+
+                    cash_amount = db_transaction.quantity * db_transaction.price
+                    cash_transaction_type = 'withdrawal' if db_transaction.transaction_type == 'buy' else 'deposit'
+                    final_cash_amount = 0
+
+                    if db_transaction.transaction_type == 'buy':
+                        final_cash_amount = cash_amount + db_transaction.fee
+                    else: # sell
+                        final_cash_amount = cash_amount - db_transaction.fee - db_transaction.tax
+
+                    cash_transaction_data = {
+                        'asset_id': cash_asset.id,
+                        'portfolio_id': db_portfolio.id,
+                        'transaction_type': cash_transaction_type,
+                        'quantity': final_cash_amount,
+                        'price': 1,
+                        'transaction_date': db_transaction.transaction_date,
+                        'fee': 0,
+                        'tax': 0,
+                    }
+                    documents.append(models.Transaction(**cash_transaction_data))
+
+        # All-or-nothing write; nothing has been written if validation failed above
+        if documents:
+            await _insert_atomically(documents)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An unexpected error occurred during batch creation: {e}")
+
+    return created_transactions
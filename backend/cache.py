@@ -0,0 +1,309 @@
+import os
+import time
+import pickle
+import hashlib
+import inspect
+import tempfile
+import functools
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse, urlunparse
+
+import pandas as pd
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+# Root directory for on-disk caches. Override with DATA_CACHE_DIR (e.g. a shared volume in Docker).
+CACHE_DIR = os.getenv(
+    "DATA_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache"),
+)
+
+# Default freshness window for cached market data. Daily bars only change once a day,
+# but the last candle of a range ending today can still move, so keep this short.
+DEFAULT_TTL_SECONDS = 12 * 60 * 60
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.empty
+    if isinstance(value, (dict, list, tuple)):
+        return len(value) == 0
+    return False
+
+
+def _cache_path(namespace: str, key) -> str:
+    digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, namespace, f"{digest}.pkl")
+
+
+def _load(path: str, ttl_seconds: Optional[float]):
+    """Returns the pickled value at `path`, or None if it is missing, stale or unreadable."""
+    try:
+        if ttl_seconds is not None and time.time() - os.path.getmtime(path) > ttl_seconds:
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def _dump(path: str, value) -> None:
+    """Writes atomically so concurrent readers never see a partially written file."""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: Could not write cache file {path}: {e}")
+
+
+def disk_cache(namespace: str, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS) -> Callable:
+    """
+    Memoizes a function on disk, keyed by its name and arguments.
+    Empty results (the fetchers' way of reporting an error) are not cached,
+    so a transient provider failure is retried on the next call.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            path = _cache_path(namespace, (func.__qualname__, args, sorted(kwargs.items())))
+            cached = _load(path, ttl_seconds)
+            if cached is not None:
+                return cached
+
+            result = func(*args, **kwargs)
+            if not _is_empty(result):
+                _dump(path, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def disk_cache_timeseries(namespace: str, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS) -> Callable:
+    """
+    Disk cache for `func(symbol, start_date, end_date) -> DataFrame` fetchers.
+    Entries are keyed by symbol only and remember the date range they cover, so any
+    request inside an already fetched window is served by slicing the cached frame.
+    A request outside it fetches the union of both ranges and replaces the entry.
+    Only the last bars of a fetch can still move, so `ttl_seconds` applies to requests reaching
+    the day before the fetch or later; requests for bars settled at fetch time never expire.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+            path = _cache_path(namespace, (func.__qualname__, symbol))
+            start_ts, end_ts = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+            cached = _load(path, None)
+            if cached is not None:
+                fetched_at = cached.get("fetched_at", 0.0)
+                # US bars settle the next morning in Asia, so allow one day of slack
+                settled = end_ts < pd.Timestamp.fromtimestamp(fetched_at).normalize() - pd.Timedelta(days=1)
+                if not settled and ttl_seconds is not None and time.time() - fetched_at > ttl_seconds:
+                    cached = None
+            if cached is not None:
+                if cached["start"] <= start_ts and end_ts <= cached["end"]:
+                    return cached["data"].loc[start_ts:end_ts].copy()
+                start_ts, end_ts = min(start_ts, cached["start"]), max(end_ts, cached["end"])
+
+            data = func(symbol, start_ts.strftime('%Y-%m-%d'), end_ts.strftime('%Y-%m-%d'))
+            if not _is_empty(data):
+                _dump(path, {"start": start_ts, "end": end_ts, "data": data, "fetched_at": time.time()})
+                return data.loc[pd.Timestamp(start_date):pd.Timestamp(end_date)].copy()
+            return data
+        return wrapper
+    return decorator
+
+
+def parquet_series_cache(name: str, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS) -> Callable:
+    """
+    Parquet-backed cache for `func(start_date, end_date) -> DataFrame` fetchers of append-only daily series
+    (e.g. the FRED yield curve). The whole history lives in one file; a request past its last row fetches only
+    the tail from that row on, and a request before its first row refetches the union range. Once the file was
+    refreshed within `ttl_seconds`, requests are answered from it even if the provider has not published up to
+    `end_date` yet, so a publication lag does not trigger a fetch on every call.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(start_date: str, end_date: str) -> pd.DataFrame:
+            path = os.path.join(CACHE_DIR, f"{name}.parquet")
+            start_ts, end_ts = pd.Timestamp(start_date), pd.Timestamp(end_date)
+
+            cached = None
+            try:
+                if os.path.exists(path):
+                    cached = pd.read_parquet(path, engine='fastparquet')
+            except Exception as e:
+                print(f"Warning: Could not read cache file {path}: {e}")
+
+            fetch_start = start_ts
+            if cached is not None and not cached.empty:
+                first, last = cached.index.min(), cached.index.max()
+                fresh = ttl_seconds is None or time.time() - os.path.getmtime(path) <= ttl_seconds
+                if first <= start_ts and (end_ts <= last or fresh):
+                    return cached.loc[start_ts:end_ts].copy()
+                # Re-fetch from the last cached row so a late revision of that day is picked up too
+                fetch_start = last if first <= start_ts else start_ts
+                end_ts = max(end_ts, last)
+
+            fetched = func(fetch_start.strftime('%Y-%m-%d'), end_ts.strftime('%Y-%m-%d'))
+            if _is_empty(fetched):
+                return cached.loc[start_ts:end_ts].copy() if cached is not None else fetched
+
+            combined = fetched if cached is None else pd.concat([cached, fetched])
+            combined = combined[~combined.index.duplicated(keep='last')].sort_index().ffill()
+            tmp_path = None
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".parquet.tmp")
+                os.close(fd)
+                # fastparquet, as elsewhere in the repo (pyarrow builds hit illegal-instruction errors on some hosts)
+                combined.to_parquet(tmp_path, engine='fastparquet')
+                os.replace(tmp_path, path)
+            except Exception as e:
+                print(f"Warning: Could not write cache file {path}: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return combined.loc[start_ts:pd.Timestamp(end_date)].copy()
+        return wrapper
+    return decorator
+
+
+def memory_cache(ttl_seconds: float, maxsize: int = 128) -> Callable:
+    """
+    In-process TTL memo in front of the disk cache, for endpoint payloads that repeat across UI reloads.
+    Works on both sync and async functions; empty results are not cached. Oldest entries are evicted first.
+    """
+    def decorator(func: Callable) -> Callable:
+        entries = {}
+
+        def lookup(key):
+            entry = entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= ttl_seconds:
+                return entry[1]
+            return None
+
+        def store(key, value):
+            if _is_empty(value):
+                return
+            entries.pop(key, None)
+            entries[key] = (time.monotonic(), value)
+            while len(entries) > maxsize:
+                entries.pop(next(iter(entries)))
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = (args, tuple(sorted(kwargs.items())))
+                cached = lookup(key)
+                if cached is None:
+                    cached = await func(*args, **kwargs)
+                    store(key, cached)
+                return cached
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            cached = lookup(key)
+            if cached is None:
+                cached = func(*args, **kwargs)
+                store(key, cached)
+            return cached
+        return wrapper
+    return decorator
+
+
+def etag_response(request: Request, payload, max_age: int) -> Response:
+    """
+    Renders `payload` as JSON with an ETag and Cache-Control header, or answers 304 Not Modified
+    when the client's If-None-Match already names this exact body.
+    """
+    response = ORJSONResponse(payload)
+    etag = f'"{hashlib.sha256(response.body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={max_age}"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return response
+
+
+# --- Latest-price cache (Redis, shared by all API workers) ---
+# Keys are "px:{symbol}:{yyyy-mm-dd}". If Redis can't be reached, an in-process map keeps the
+# endpoint working with per-worker caching instead of failing. After a failure Redis is skipped for
+# REDIS_RETRY_SECONDS, so requests don't each wait on connection timeouts while it is down.
+REDIS_RETRY_SECONDS = 30
+_redis_client = None
+_redis_down_until = 0.0  # monotonic time before which Redis is not tried again
+_local_prices = {}  # key -> (expires_at monotonic, price)
+
+
+def _price_redis():
+    global _redis_client
+    if _redis_client is None:
+        import redis.asyncio as aioredis
+
+        # Same URL handling as workers/flush_redis.py: drop query params, relax certs for rediss://
+        raw_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        clean_url = urlunparse(urlparse(raw_url)._replace(query=""))
+        kwargs = {"socket_connect_timeout": 0.5, "socket_timeout": 0.5}
+        if clean_url.startswith("rediss://"):
+            import ssl
+            kwargs["ssl_cert_reqs"] = ssl.CERT_NONE
+        _redis_client = aioredis.from_url(clean_url, **kwargs)
+    return _redis_client
+
+
+def _redis_available() -> bool:
+    return time.monotonic() >= _redis_down_until
+
+
+def _mark_redis_down(e: Exception) -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+    print(f"Warning: Redis price cache unavailable, using in-process cache for {REDIS_RETRY_SECONDS}s: {e}")
+
+
+def _price_key(symbol: str, day: str) -> str:
+    return f"px:{symbol}:{day}"
+
+
+async def get_prices(symbols: List[str], day: str) -> Dict[str, float]:
+    """Cached prices for `day`, fetched with one MGET. Symbols without a live entry are left out."""
+    if not symbols:
+        return {}
+    keys = [_price_key(symbol, day) for symbol in symbols]
+    if _redis_available():
+        try:
+            values = await _price_redis().mget(keys)
+            return {symbol: float(value) for symbol, value in zip(symbols, values) if value is not None}
+        except Exception as e:
+            _mark_redis_down(e)
+    now = time.monotonic()
+    entries = ((symbol, _local_prices.get(key)) for symbol, key in zip(symbols, keys))
+    return {symbol: entry[1] for symbol, entry in entries if entry is not None and entry[0] > now}
+
+
+async def set_prices(prices: Dict[str, float], day: str, ttl_seconds: int) -> None:
+    """Stores prices for `day` with an expiry, in one pipelined round-trip."""
+    if not prices:
+        return
+    if _redis_available():
+        try:
+            async with _price_redis().pipeline(transaction=False) as pipe:
+                for symbol, price in prices.items():
+                    pipe.set(_price_key(symbol, day), price, ex=ttl_seconds)
+                await pipe.execute()
+            return
+        except Exception as e:
+            _mark_redis_down(e)
+    now = time.monotonic()
+    for key in [key for key, (expires_at, _) in _local_prices.items() if expires_at <= now]:
+        del _local_prices[key]
+    expires_at = now + ttl_seconds
+    for symbol, price in prices.items():
+        _local_prices[_price_key(symbol, day)] = (expires_at, price)
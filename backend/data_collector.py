@@ -9,12 +9,14 @@ from io import BytesIO
 import urllib.request
 import zipfile
 import os
+import asyncio
 import tempfile
 import shutil
 import FinanceDataReader as fdr
 import OpenDartReader
 
 from . import models
+from .cache import disk_cache, disk_cache_timeseries, parquet_series_cache
 
 # For development only: Disable SSL certificate verification
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -36,6 +38,7 @@ async def _get_symbols_from_db(symbol_model) -> List[str]:
     symbols = await symbol_model.find_all().to_list()
     return [s.symbol for s in symbols]
 
+@disk_cache_timeseries("historical")
 def get_historical_data(symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
     """
     Fetches historical stock data for a given symbol and date range using FinanceDataReader.
@@ -68,43 +71,67 @@ def get_stock_data(symbol: str, start_date: str, end_date: str = None) -> pd.Dat
         print(f"Error fetching data for {symbol} from {start_date} to {end_date} using FinanceDataReader: {e}")
         return pd.DataFrame()
 
+def get_latest_close_prices(symbols: List[str], start_date: str, end_date: str, chunk_size: int = 20) -> Dict[str, float]:
+    """
+    Latest close for each of the given Yahoo tickers, fetched with one multi-symbol yfinance download per
+    `chunk_size` tickers instead of one request per symbol. Tickers with no data are left out of the result.
+    `end_date` is inclusive, like FinanceDataReader's.
+    """
+    prices = {}
+    # yfinance treats `end` as exclusive; without the extra day a range ending today would miss today's bar
+    download_end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        try:
+            data = yf.download(chunk, start=start_date, end=download_end, group_by='ticker', threads=True, progress=False)
+        except Exception as e:
+            print(f"Error fetching prices for {', '.join(chunk)} using yfinance: {e}")
+            continue
+        if data.empty:
+            continue
+
+        for symbol in chunk:
+            # group_by='ticker' yields (ticker, field) columns; a single-ticker download may come back flat
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol not in data.columns.get_level_values(0):
+                    continue
+                close = data[symbol]['Close'].dropna()
+            else:
+                close = data['Close'].dropna()
+            if not close.empty:
+                prices[symbol] = float(close.iloc[-1])
+
+    return prices
+
+# (result key, FinanceDataReader ticker, label used in log messages)
+BENCHMARK_TICKERS = [
+    ("S&P 500", "S&P500", "S&P 500"),
+    ("KOSPI", "KS11", "KOSPI (KS11)"),
+    ("Nikkei 225", "N225", "Nikkei 225 (N225)"),
+]
+
 async def get_benchmark_historical_data(start_date: str, end_date: str) -> Dict[str, pd.DataFrame]:
     benchmark_dfs = {}
 
-    # S&P 500 - Use FinanceDataReader
-    try:
-        sp500_df = get_historical_data("S&P500", start_date, end_date)
-        if not sp500_df.empty:
-            benchmark_dfs["S&P 500"] = sp500_df
-        else:
-            print("Warning: No historical data for S&P 500 using FinanceDataReader.")
-    except Exception as e:
-        print(f"Error fetching S&P 500 data using FinanceDataReader: {e}")
-
-    # KOSPI (KS11) - Use FinanceDataReader
-    try:
-        kospi_df = get_historical_data("KS11", start_date, end_date)
-        if not kospi_df.empty:
-            benchmark_dfs["KOSPI"] = kospi_df
-        else:
-            print("Warning: No historical data for KOSPI (KS11).")
-    except Exception as e:
-        print(f"Error fetching KOSPI (KS11) data: {e}")
-
-    # Nikkei 225 (N225) - Use FinanceDataReader
-    try:
-        nikkei_df = get_historical_data("N225", start_date, end_date)
-        if not nikkei_df.empty:
-            benchmark_dfs["Nikkei 225"] = nikkei_df
+    # FinanceDataReader is blocking; run the three index fetches in worker threads so they overlap
+    # and the event loop stays free for other requests
+    results = await asyncio.gather(
+        *(asyncio.to_thread(get_historical_data, ticker, start_date, end_date) for _, ticker, _ in BENCHMARK_TICKERS),
+        return_exceptions=True,
+    )
+    for (name, _, label), df in zip(BENCHMARK_TICKERS, results):
+        if isinstance(df, Exception):
+            print(f"Error fetching {label} data using FinanceDataReader: {df}")
+        elif df.empty:
+            print(f"Warning: No historical data for {label} using FinanceDataReader.")
         else:
-            print("Warning: No historical data for Nikkei 225 (N225).")
-    except Exception as e:
-        print(f"Error fetching Nikkei 225 (N225) data: {e}")
+            benchmark_dfs[name] = df
 
     return benchmark_dfs
 
 from dotenv import load_dotenv
 
+@parquet_series_cache("fred_yield_curve")
 def get_fred_yield_curve(start_date: str, end_date: str) -> pd.DataFrame:
     """
     Fetches US Treasury yield curve rates from the FRED API.
@@ -175,6 +202,7 @@ def _clean_and_convert_to_float(value):
             return 0.0
     return 0.0
 
+@disk_cache("fundamental_kr", ttl_seconds=7 * 24 * 60 * 60)
 def get_korean_fundamental_data(symbol: str, year: int, quarter: int, re_evaluation_frequency: str) -> Dict:
     """
     Fetches Korean fundamental data for a given symbol and period using OpenDartReader.
@@ -20,6 +20,36 @@ DATABASE_URL = os.getenv("DATABASE_URL", "mongodb://localhost:27017")
 client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None
 db = None
 
+async def _dedupe_portfolio_names(database):
+    """
+    One-off migration for the unique index on Portfolio.name, skipped once that index exists. Older worker runs
+    named backtest portfolios only to the minute, so they could collide: duplicates among them get an id suffix.
+    Live portfolios are referred to by name (UI, Telegram bot), so they are never renamed; duplicate live names
+    stop startup until they are fixed by hand.
+    """
+    collection = database[models.Portfolio.Settings.name]
+    if "name_1" in await collection.index_information():
+        return
+
+    duplicates = collection.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$name", "portfolios": {"$push": {"id": "$_id", "environment": "$environment"}}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ])
+    async for group in duplicates:
+        name = group["_id"]
+        live_ids = [p["id"] for p in group["portfolios"] if p.get("environment", "live") != "backtest"]
+        backtest_ids = [p["id"] for p in group["portfolios"] if p.get("environment", "live") == "backtest"]
+        if len(live_ids) > 1:
+            print(f"ERROR: {len(live_ids)} live portfolios share the name '{name}' ({', '.join(map(str, live_ids))}). "
+                  f"Rename all but one of them; the unique portfolio name index cannot be built until then.")
+            raise RuntimeError(f"Duplicate live portfolio name '{name}'")
+        # A live portfolio keeps its name; among backtest portfolios only, the oldest does
+        for portfolio_id in (backtest_ids if live_ids else backtest_ids[1:]):
+            new_name = f"{name[:43]} {str(portfolio_id)[-6:]}"  # stays within the 50-char name limit
+            await collection.update_one({"_id": portfolio_id}, {"$set": {"name": new_name}})
+            print(f"Renamed duplicate backtest portfolio '{name}' ({portfolio_id}) to '{new_name}'")
+
 async def init_db():
     """
     Initializes the database connection and Beanie ODM.
@@ -27,7 +57,10 @@ async def init_db():
     global client, db
     client = motor.motor_asyncio.AsyncIOMotorClient(DATABASE_URL)
     db = client.ttnw
-    
+
+    # Must run before init_beanie builds the unique index on Portfolio.name
+    await _dedupe_portfolio_names(db)
+
     await init_beanie(
         database=db,
         document_models=[
@@ -43,6 +76,14 @@ async def init_db():
         ],
     )
 
+    # Transactions look cash assets up by their canonical lowercase symbol; normalize any stored in another case
+    for symbol in ("cash_krw", "cash_usd"):
+        if not await models.Asset.find_one(models.Asset.symbol == symbol):
+            await models.Asset.find_one(
+                models.Asset.asset_type == "cash",
+                {"symbol": {"$regex": f"^{symbol}$", "$options": "i"}},
+            ).update({"$set": {"symbol": symbol}})
+
 async def get_portfolio_assets(portfolio_id: UUID) -> List[Asset]:
     """
     Retrieves all assets associated with a given portfolio ID.
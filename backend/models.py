@@ -1,5 +1,6 @@
 from beanie import Document, Link, PydanticObjectId
 from pydantic import BaseModel, Field
+from pymongo import IndexModel, ASCENDING
 from datetime import datetime
 from typing import List, Optional, Dict
 
@@ -18,6 +19,8 @@ class Portfolio(Document):
 
     class Settings:
         name = "portfolios"
+        # Names identify portfolios in the UI and bot commands; let Mongo enforce uniqueness
+        indexes = [IndexModel([("name", ASCENDING)], unique=True)]
 
 class Asset(Document):
     symbol: str = Field(..., max_length=50)
@@ -27,6 +30,15 @@ class Asset(Document):
 
     class Settings:
         name = "assets"
+        # Symbols are globally unique; also serves symbol lookups from transactions and backtests
+        indexes = [IndexModel([("symbol", ASCENDING)], unique=True)]
+
+class AssetTradingInfo(BaseModel):
+    """Projection of Asset with only the fields the backtesting engine reads."""
+    symbol: str
+    name: str
+    asset_type: str
+    minimum_tradable_quantity: Optional[float] = 1.0
 
 class Transaction(Document):
     asset_id: PydanticObjectId
@@ -40,6 +52,8 @@ class Transaction(Document):
 
     class Settings:
         name = "transactions"
+        # Holdings and transaction lists read one portfolio's transactions, in date order
+        indexes = [IndexModel([("portfolio_id", ASCENDING), ("transaction_date", ASCENDING)])]
 
 
 class VirtualTransaction(Document):
@@ -55,6 +69,11 @@ class VirtualTransaction(Document):
 
     class Settings:
         name = "virtual_transactions" # Separate collection for virtual transactions
+        # Every read of a backtest's transactions filters on its result id; portfolio history reads by date
+        indexes = [
+            IndexModel([("backtest_result_id", ASCENDING)]),
+            IndexModel([("portfolio_id", ASCENDING), ("transaction_date", ASCENDING)]),
+        ]
 
 class US_Symbol(Document):
     symbol: str = Field(..., max_length=50)
@@ -106,4 +125,6 @@ class BacktestResult(Document):
     }
 
     class Settings:
-        name = "backtest_results"
\ No newline at end of file
+        name = "backtest_results"
+        # Links are stored as DBRefs; index the referenced id for strategy lookups and $lookup joins
+        indexes = [IndexModel([("strategy.$id", ASCENDING)])]
\ No newline at end of file
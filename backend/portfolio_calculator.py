@@ -1,64 +1,83 @@
+import asyncio
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from beanie import PydanticObjectId
 
 from .data_collector import get_stock_data, get_historical_data
+from ._njit import njit, NUMBA_AVAILABLE
 from . import models
 
+@njit(cache=True, nogil=True) # nogil: called from worker threads (asyncio.to_thread) by the API
+def _daily_portfolio_value(quantity_changes, prices):
+    """
+    Walks the [n_days, n_assets] daily quantity changes, carrying holdings forward, and returns the
+    value of the holdings at each day's prices. Missing (NaN) prices contribute nothing, like DataFrame.sum.
+    """
+    n_days, n_assets = quantity_changes.shape
+    holdings = np.zeros(n_assets)
+    values = np.zeros(n_days)
+    for d in range(n_days):
+        total = 0.0
+        for a in range(n_assets):
+            holdings[a] += quantity_changes[d, a]
+            position_value = holdings[a] * prices[d, a]
+            if not np.isnan(position_value):
+                total += position_value
+        values[d] = total
+    return values
+
+def _daily_portfolio_value_np(quantity_changes, prices):
+    """Vectorized equivalent of _daily_portfolio_value, used when numba is absent and the loop would run as Python."""
+    return np.nansum(np.cumsum(quantity_changes, axis=0) * prices, axis=1)
+
 def calculate_portfolio_value(transactions: List[Dict], historical_prices: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     if not transactions:
         return pd.DataFrame(columns=['Date', 'Value'])
 
     trans_df = pd.DataFrame(transactions)
     trans_df['transaction_date'] = pd.to_datetime(trans_df['transaction_date'])
-    trans_df['symbol'] = trans_df['asset'].apply(lambda x: x['symbol'])
-    
-    def adjust_quantity(row):
-        if row['transaction_type'] in ['buy', 'deposit']:
-            return row['quantity']
-        if row['transaction_type'] == 'dividend':
-            return row['quantity'] - (row['tax'] or 0)
-        if row['transaction_type'] in ['sell', 'withdrawal']:
-            return -row['quantity']
-        return 0
-
-    trans_df['quantity_adj'] = trans_df.apply(adjust_quantity, axis=1)
-    
-    all_dates = []
-    if not trans_df.empty:
-        all_dates.extend(trans_df['transaction_date'].tolist())
-    
-    for symbol, df in historical_prices.items():
-        if not df.empty:
-            all_dates.extend(df.index.tolist())
-    
-    if not all_dates:
-        return pd.DataFrame(columns=['Date', 'Value'])
-
-    start_date = min(all_dates)
-    end_date = max(all_dates)
+    trans_df['symbol'] = [asset['symbol'] for asset in trans_df['asset']]
+
+    # Signed quantity per transaction: inflows add, outflows subtract, dividends add net of tax
+    tx_type = trans_df['transaction_type']
+    tax = trans_df['tax'].fillna(0) if 'tax' in trans_df else 0
+    trans_df['quantity_adj'] = np.select(
+        [tx_type.isin(['buy', 'deposit']), tx_type.eq('dividend'), tx_type.isin(['sell', 'withdrawal'])],
+        [trans_df['quantity'], trans_df['quantity'] - tax, -trans_df['quantity']],
+        default=0,
+    )
+
+    date_indexes = [pd.DatetimeIndex(trans_df['transaction_date'])]
+    date_indexes.extend(pd.DatetimeIndex(df.index) for df in historical_prices.values() if not df.empty)
+    start_date = min(idx.min() for idx in date_indexes)
+    end_date = max(idx.max() for idx in date_indexes)
     date_range = pd.date_range(start=start_date, end=end_date, freq='D')
 
-    holdings_df = trans_df.groupby(['transaction_date', 'symbol'])['quantity_adj'].sum().unstack().fillna(0)
-    holdings_df = holdings_df.reindex(date_range).fillna(0).cumsum()
+    quantity_changes_df = trans_df.groupby(['transaction_date', 'symbol'])['quantity_adj'].sum().unstack().fillna(0)
+    quantity_changes_df = quantity_changes_df.reindex(date_range).fillna(0)
 
     prices_df = pd.DataFrame(index=date_range)
     for symbol, df in historical_prices.items():
-        if symbol in holdings_df.columns:
+        if symbol in quantity_changes_df.columns:
             # Use bfill to propagate first available price backwards
             prices_df[symbol] = df['Close'].reindex(date_range, method='bfill')
 
     prices_df.ffill(inplace=True) # Then ffill to fill any remaining gaps
 
-    common_symbols = holdings_df.columns.intersection(prices_df.columns)
-    daily_portfolio_value = (holdings_df[common_symbols] * prices_df[common_symbols]).sum(axis=1)
+    common_symbols = quantity_changes_df.columns.intersection(prices_df.columns)
+    # Holdings are carried forward and valued day by day in one compiled loop over the aligned matrices
+    value_kernel = _daily_portfolio_value if NUMBA_AVAILABLE else _daily_portfolio_value_np
+    daily_portfolio_value = value_kernel(
+        quantity_changes_df[common_symbols].to_numpy(dtype=np.float64),
+        prices_df[common_symbols].to_numpy(dtype=np.float64),
+    )
 
-    if daily_portfolio_value.empty:
+    if daily_portfolio_value.size == 0:
         return pd.DataFrame(columns=['Date', 'Value'])
         
-    return pd.DataFrame({'Date': daily_portfolio_value.index, 'Value': daily_portfolio_value.values})
+    return pd.DataFrame({'Date': date_range, 'Value': daily_portfolio_value})
 
 def calculate_returns(portfolio_value: pd.DataFrame) -> pd.Series:
     if portfolio_value.empty or len(portfolio_value) < 2:
@@ -86,11 +105,47 @@ def calculate_max_drawdown(cumulative_returns: pd.Series) -> float:
     cumulative_returns = cumulative_returns.replace([np.inf, -np.inf], np.nan).dropna()
     if cumulative_returns.empty:
         return 0.0
-    peak = cumulative_returns.expanding(min_periods=1).max()
-    drawdown = (cumulative_returns - peak) / (peak + 1)
-    max_drawdown = drawdown.min()
+    # Drawdown of the wealth curve (1 + cumulative return) against its running peak, in one pass
+    wealth = cumulative_returns.to_numpy(dtype=np.float64) + 1
+    peak = np.maximum.accumulate(wealth)
+    max_drawdown = float(((wealth - peak) / peak).min())
     return max_drawdown if np.isfinite(max_drawdown) else 0.0
 
+def calculate_performance_metrics(portfolio_value: pd.DataFrame, annualization_factor: int = 12):
+    """
+    Returns (daily returns, cumulative returns, volatility, max drawdown) from one numpy pass over the Value column.
+    Gives the same results as chaining calculate_returns, calculate_cumulative_returns, calculate_volatility and
+    calculate_max_drawdown, without building an intermediate Series for every step.
+    """
+    if portfolio_value.empty or len(portfolio_value) < 2:
+        return pd.Series(), pd.Series(), 0.0, 0.0
+
+    # pct_change pads NaN values forward before dividing, and the NaN returns it still yields are dropped
+    values = portfolio_value['Value'].ffill().to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = values[1:] / values[:-1] - 1
+    keep = ~np.isnan(returns)
+    returns = np.where(np.isinf(returns), 0.0, returns)[keep]
+    if returns.size == 0:
+        return pd.Series(), pd.Series(), 0.0, 0.0
+    dates = pd.Index(portfolio_value['Date'].to_numpy()[1:][keep], name='Date')
+
+    cumulative = np.cumprod(1 + returns) - 1
+    volatility = returns.std(ddof=1) * (annualization_factor ** 0.5) if returns.size > 1 else np.nan
+
+    wealth = cumulative[np.isfinite(cumulative)] + 1
+    max_drawdown = 0.0
+    if wealth.size:
+        peak = np.maximum.accumulate(wealth)
+        max_drawdown = float(((wealth - peak) / peak).min())
+
+    return (
+        pd.Series(returns, index=dates, name='Value'),
+        pd.Series(cumulative, index=dates, name='Value'),
+        float(volatility) if np.isfinite(volatility) else 0.0,
+        max_drawdown if np.isfinite(max_drawdown) else 0.0,
+    )
+
 async def get_portfolio_returns(
     portfolio_id: PydanticObjectId, start_date: str, end_date: str
 ) -> Dict:
@@ -124,17 +179,16 @@ async def get_portfolio_returns(
                 "transaction_date": t.transaction_date,
             })
 
-    historical_prices = {}
-    for asset in assets:
+    async def load_prices(asset) -> pd.DataFrame:
         if asset.asset_type == "cash":
-            data = pd.DataFrame({'Close': 1.0}, index=pd.to_datetime(pd.date_range(start=start_date, end=end_date, freq='D')))
-        elif "stock_us" in asset.asset_type:
-            data = get_historical_data(asset.symbol, start_date, end_date)
-        elif "stock_kr" in asset.asset_type:
-            data = get_historical_data(asset.symbol, start_date, end_date)
-        else:
-            data = pd.DataFrame()
+            return pd.DataFrame({'Close': 1.0}, index=pd.to_datetime(pd.date_range(start=start_date, end=end_date, freq='D')))
+        elif "stock_us" in asset.asset_type or "stock_kr" in asset.asset_type:
+            # Blocking network fetch: run it in a worker thread so the event loop stays free
+            return await asyncio.to_thread(get_historical_data, asset.symbol, start_date, end_date)
+        return pd.DataFrame()
 
+    historical_prices = {}
+    for asset, data in zip(assets, await asyncio.gather(*(load_prices(asset) for asset in assets))):
         if not data.empty:
             historical_prices[asset.symbol] = data
 
@@ -146,10 +200,7 @@ async def get_portfolio_returns(
     if portfolio_value.empty:
         return {"error": "Could not calculate portfolio value."}
 
-    daily_returns = calculate_returns(portfolio_value)
-    cumulative_returns = calculate_cumulative_returns(daily_returns)
-    volatility = calculate_volatility(daily_returns, annualization_factor=252)
-    max_drawdown = calculate_max_drawdown(cumulative_returns)
+    daily_returns, cumulative_returns, volatility, max_drawdown = calculate_performance_metrics(portfolio_value, annualization_factor=252)
 
     return {
         "portfolio_value": portfolio_value.to_dict(orient="records"),
@@ -159,50 +210,68 @@ async def get_portfolio_returns(
         "max_drawdown": max_drawdown,
     }
 
-def calculate_current_holdings(transactions: List[models.Transaction]) -> Dict[PydanticObjectId, Dict]:
+async def aggregate_current_holdings(portfolio_id: PydanticObjectId) -> Tuple[Dict[PydanticObjectId, Dict], Dict[PydanticObjectId, models.Asset]]:
     """
-    Calculates current holdings (quantity, average price) for each asset based on transactions.
-    Uses the Moving Average Cost method:
-    - Buy: Updates average price (weighted average).
-    - Sell: Reduces quantity, Average price remains unchanged.
+    Current holdings (quantity, average price) per asset, using the Moving Average Cost method:
+    a buy re-weights the average price, a sell only reduces the quantity (floored at zero).
+    Computed inside MongoDB: one aggregation replays each asset's buys and sells in date order ($reduce)
+    and joins the asset, so only one row per held asset comes back.
+    Returns (holdings by asset id, assets by id).
     """
-    holdings = {} # {asset_id: {'quantity': float, 'total_cost': float, 'average_price': float}}
-
-    # Sort transactions by date just in case, though they are usually fetched in order or inserted in order
-    sorted_transactions = sorted(transactions, key=lambda t: t.transaction_date)
-
-    for t in sorted_transactions:
-        asset_id = t.asset_id
-        if asset_id not in holdings:
-            holdings[asset_id] = {'quantity': 0.0, 'total_cost': 0.0, 'average_price': 0.0}
-        
-        current = holdings[asset_id]
-
-        if t.transaction_type == 'buy':
-            # Weighted Average Price Calculation
-            # New Avg = (Old Qty * Old Avg + New Qty * New Price) / (Old Qty + New Qty)
-            total_qty = current['quantity'] + t.quantity
-            if total_qty > 0:
-                # Update total cost based on current holding cost + new purchase cost
-                current_holding_cost = current['quantity'] * current['average_price']
-                new_purchase_cost = t.quantity * t.price
-                current['average_price'] = (current_holding_cost + new_purchase_cost) / total_qty
-            
-            current['quantity'] += t.quantity
-            # Total cost tracks the "book value" of currently held assets
-            current['total_cost'] = current['quantity'] * current['average_price']
-
-        elif t.transaction_type == 'sell':
-            # For Sell, Avg Price doesn't change, only Quantity decreases
-            current['quantity'] -= t.quantity
-            # Prevent negative quantity (floating point errors)
-            if current['quantity'] < 0:
-                current['quantity'] = 0.0
-            
-            # Recalculate total cost based on remaining quantity
-            current['total_cost'] = current['quantity'] * current['average_price']
-
-    # Filter out holdings with 0 quantity
-    active_holdings = {k: v for k, v in holdings.items() if v['quantity'] > 0.000001}
-    
-    return active_holdings
+    value, this = "$$value", "$$this"
+    bought_qty = {"$add": [f"{value}.quantity", f"{this}.quantity"]}
+    replay = {
+        "$reduce": {
+            "input": "$transactions",
+            "initialValue": {"quantity": 0.0, "average_price": 0.0},
+            "in": {"$switch": {
+                "branches": [
+                    # Buy: weighted average of the held and the purchased quantity
+                    {"case": {"$eq": [f"{this}.transaction_type", "buy"]}, "then": {
+                        "quantity": bought_qty,
+                        "average_price": {"$cond": [
+                            {"$gt": [bought_qty, 0]},
+                            {"$divide": [
+                                {"$add": [
+                                    {"$multiply": [f"{value}.quantity", f"{value}.average_price"]},
+                                    {"$multiply": [f"{this}.quantity", f"{this}.price"]},
+                                ]},
+                                bought_qty,
+                            ]},
+                            f"{value}.average_price",
+                        ]},
+                    }},
+                    # Sell: quantity only, floored at zero
+                    {"case": {"$eq": [f"{this}.transaction_type", "sell"]}, "then": {
+                        "quantity": {"$max": [{"$subtract": [f"{value}.quantity", f"{this}.quantity"]}, 0.0]},
+                        "average_price": f"{value}.average_price",
+                    }},
+                ],
+                "default": value,
+            }},
+        }
+    }
+    pipeline = [
+        {"$match": {"portfolio_id": portfolio_id, "transaction_type": {"$in": ["buy", "sell"]}}},
+        {"$sort": {"transaction_date": 1, "_id": 1}},
+        {"$group": {
+            "_id": "$asset_id",
+            "first_date": {"$first": "$transaction_date"},
+            "transactions": {"$push": {"transaction_type": "$transaction_type", "quantity": "$quantity", "price": "$price"}},
+        }},
+        {"$project": {"first_date": 1, "holding": replay}},
+        {"$match": {"holding.quantity": {"$gt": 0.000001}}},
+        {"$sort": {"first_date": 1, "_id": 1}},
+        {"$lookup": {"from": models.Asset.Settings.name, "localField": "_id", "foreignField": "_id", "as": "asset"}},
+        {"$unwind": "$asset"},
+    ]
+    rows = await models.Transaction.aggregate(pipeline).to_list()
+
+    holdings = {}
+    assets = {}
+    for row in rows:
+        quantity = row["holding"]["quantity"]
+        average_price = row["holding"]["average_price"]
+        holdings[row["_id"]] = {'quantity': quantity, 'total_cost': quantity * average_price, 'average_price': average_price}
+        assets[row["_id"]] = models.Asset.model_validate(row["asset"])
+    return holdings, assets
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from datetime import datetime
+from datetime import datetime, date
 from typing import Optional, Union, Dict, List, Literal
 from beanie import PydanticObjectId
 from bson import ObjectId # Import ObjectId for json_encoders
@@ -99,6 +99,26 @@ class Portfolio(PortfolioBase):
     )
 
 
+class PortfolioSummary(BaseModel):
+    """List view of a portfolio: only the fields pickers and tables need, without the linked strategy."""
+    id: PydanticObjectId
+    name: str
+    manager: Optional[str] = None
+    environment: str = 'live'
+    status: str = 'active'
+    created_at: datetime
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str}
+    )
+
+    class Settings:
+        # Beanie projection: read only these fields from MongoDB
+        projection = {"id": "$_id", "name": 1, "manager": 1, "environment": 1, "status": 1, "created_at": 1}
+
+
 class AssetWeightInStrategy(BaseModel):
     asset: str = Field(..., description="Asset symbol or ticker")
     asset_type: Optional[str] = Field(None, description="Type of the asset (e.g., stock_us, stock_kr_kospi)")
@@ -145,8 +165,8 @@ class StrategyCreate(BaseModel):
 
 class StrategyBacktestRequest(BaseModel):
     strategy_id: PydanticObjectId
-    start_date: str
-    end_date: str
+    start_date: date # Parsed and validated here, so malformed dates fail the request instead of the task
+    end_date: date
     initial_capital: float = 100000000.0
     debug: bool = False
 
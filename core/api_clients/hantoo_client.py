@@ -4,6 +4,7 @@ import requests
 import json
 import logging
 import time
+import threading
 from datetime import datetime, timedelta
 
 # Configure logger
@@ -21,6 +22,11 @@ class HantooClient:
     # Class-level cache to store tokens in memory across instances (within the same process)
     # Key: account_no, Value: {'access_token': str, 'expires_at': datetime}
     _token_cache = {}
+    # Guards token refreshes: one client can be shared by several worker threads (see get_hantoo_client)
+    _token_lock = threading.Lock()
+
+    PAPER_BASE_URL = "https://openapivts.koreainvestment.com:29443"
+    PROD_BASE_URL = "https://openapi.koreainvestment.com:9443"
 
     def __init__(self, broker_provider: str, broker_account_no: str, app_key: str = None, app_secret: str = None):
         """
@@ -36,10 +42,10 @@ class HantooClient:
 
         self.is_paper = 'VPS' in broker_provider
         if self.is_paper:
-            self.base_url = "https://openapivts.koreainvestment.com:29443"
+            self.base_url = HantooClient.PAPER_BASE_URL
             self.rate_limit_delay = 0.5  # 2 request per second for VPS
         else: # Assumes production
-            self.base_url = "https://openapi.koreainvestment.com:9443"
+            self.base_url = HantooClient.PROD_BASE_URL
             self.rate_limit_delay = 0.05  # 20 requests per second for Real
         
         self.alias = broker_account_no
@@ -123,20 +129,9 @@ class HantooClient:
                 # logger.info(f"Using cached token for {self.account_no}")
                 return
 
-        path = "/oauth2/tokenP"
-        url = f"{self.base_url}{path}"
-        headers = {"content-type": "application/json"}
-        body = {
-            "grant_type": "client_credentials",
-            "appkey": self.app_key,
-            "appsecret": self.app_secret
-        }
-        
         try:
-            res = requests.post(url, headers=headers, data=json.dumps(body), timeout=30)
-            res.raise_for_status() # Raise an exception for bad status codes
-            data = res.json()
-            
+            data = HantooClient._request_token(self.base_url, self.app_key, self.app_secret)
+
             token = f"Bearer {data['access_token']}"
             expires_in = data['expires_in']
             expires_at = datetime.now() + timedelta(seconds=expires_in - 60)
@@ -154,6 +149,31 @@ class HantooClient:
             logger.error(f"Hantoo API authentication failed for account {self.account_no}: {e}")
             raise
 
+    @staticmethod
+    def _request_token(base_url: str, app_key: str, app_secret: str) -> dict:
+        """ Posts a client-credentials token request and returns the KIS token payload; raises on HTTP errors. """
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": app_key,
+            "appsecret": app_secret
+        }
+        res = requests.post(f"{base_url}/oauth2/tokenP", headers={"content-type": "application/json"}, data=json.dumps(body), timeout=30)
+        res.raise_for_status() # Raise an exception for bad status codes
+        return res.json()
+
+    @staticmethod
+    def issue_access_token(app_key: str, app_secret: str, is_paper: bool = False) -> dict:
+        """
+        Requests an access token for explicit credentials, without resolving an account.
+        Returns the KIS token payload, or {'error': ...} if the request fails.
+        """
+        base_url = HantooClient.PAPER_BASE_URL if is_paper else HantooClient.PROD_BASE_URL
+        try:
+            return HantooClient._request_token(base_url, app_key, app_secret)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Hantoo API token request failed: {e}")
+            return {"error": f"Hantoo API authentication failed: {e}"}
+
     def get_ws_approval_key(self):
         """ Fetches a one-time approval key for WebSocket connection. """ 
         path = "/oauth2/Approval"
@@ -177,7 +197,10 @@ class HantooClient:
         """ Checks token validity and returns required headers for API calls. """
         if self._token_expires_at is None or datetime.now() >= self._token_expires_at:
             # print(f"Access token expired or not found for {self.alias}. Re-authenticating...")
-            self._authenticate()
+            with HantooClient._token_lock:
+                # Another thread may have refreshed the token while this one waited for the lock
+                if self._token_expires_at is None or datetime.now() >= self._token_expires_at:
+                    self._authenticate()
         
         return {
             "content-type": "application/json; charset=utf-8",
@@ -535,3 +558,29 @@ class HantooClient:
             logger.error(f"Error parsing open orders data: {e}")
             return []
 
+
+# Shared clients are rebuilt after this long, so credentials changed in the environment are re-resolved
+CLIENT_TTL_SECONDS = 60 * 60
+_clients = {}  # (provider, account) -> (created_at monotonic, HantooClient)
+_clients_lock = threading.Lock()
+
+
+def get_hantoo_client(broker_provider: str, broker_account_no: str) -> HantooClient:
+    """
+    Shared HantooClient per (provider, account), so request handlers reuse the resolved credentials and the
+    instance's access token instead of rebuilding a client on every call. Entries expire after
+    CLIENT_TTL_SECONDS; constructor errors are not cached.
+    """
+    key = (broker_provider, broker_account_no)
+    with _clients_lock:
+        entry = _clients.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= CLIENT_TTL_SECONDS:
+            return entry[1]
+
+    client = HantooClient(broker_provider=broker_provider, broker_account_no=broker_account_no)
+    with _clients_lock:
+        now = time.monotonic()
+        for stale in [k for k, (created_at, _) in _clients.items() if now - created_at > CLIENT_TTL_SECONDS]:
+            del _clients[stale]
+        _clients[key] = (now, client)
+    return client
@@ -1,6 +1,7 @@
 import pandas as pd
 from typing import Dict
 from beanie import PydanticObjectId
+from beanie.operators import In
 
 from .base import BaseExecutor
 from ..strategies.base import DataContext, BaseStrategy
@@ -37,6 +38,7 @@ class BacktestExecutor(BaseExecutor):
         self.holdings = {symbol: 0.0 for symbol in initial_symbols}
         self.transactions_log = [] # New: Store virtual transactions in memory
         self.debug_logs = [] # New: Collect debug logs
+        self._asset_cache: Dict[str, models.Asset] = {} # symbol -> Asset, loaded once per run instead of per trade
         # self.portfolio_history = [] # Remove this
         # self.transactions = [] # Remove this
 
@@ -75,6 +77,8 @@ class BacktestExecutor(BaseExecutor):
         # If symbols are predefined, fetch all data at once.
         # If not (e.g., fundamental strategy), symbols will be discovered dynamically.
         if symbols:
+            # Resolve the known assets with one $in query; symbols discovered later are cached on first trade
+            await self._preload_assets(symbols)
             historical_data = self.data_context.get_historical_data_by_range(symbols, start_date, end_date)
             if not historical_data:
                 self.debug_logs.append("Error: No historical data available for the given symbols and date range.")
@@ -190,20 +194,32 @@ class BacktestExecutor(BaseExecutor):
             elif quantity_diff < 0: # Sell
                 await self._execute_trade(date, symbol, 'sell', abs(quantity_diff), price)
 
+    async def _preload_assets(self, symbols):
+        missing = [s for s in symbols if s not in self._asset_cache]
+        if missing:
+            assets = await models.Asset.find(In(models.Asset.symbol, missing)).to_list()
+            self._asset_cache.update({asset.symbol: asset for asset in assets})
+
+    async def _get_asset(self, symbol: str) -> models.Asset:
+        """Returns the Asset for `symbol`, memoized for the run, creating a dummy one if it does not exist."""
+        asset = self._asset_cache.get(symbol)
+        if asset is None:
+            asset = await models.Asset.find_one(models.Asset.symbol == symbol)
+            if not asset:
+                # Create a dummy asset for backtesting if it doesn't exist
+                asset = models.Asset(symbol=symbol, name=symbol, asset_type="stock_us") # Default to stock_us
+                await asset.insert()
+                if self.debug:
+                    self.debug_logs.append(f"[DEBUG] Created dummy asset for {symbol} in backtest.")
+            self._asset_cache[symbol] = asset
+        return asset
+
     async def _execute_trade(self, date: pd.Timestamp, symbol: str, trade_type: str, quantity: float, price: float):
         """Simulates a single trade, including commission and slippage, and saves it as a VirtualTransaction."""
         if self.debug:
             self.debug_logs.append(f"[DEBUG] _execute_trade called: Date={date.strftime('%Y-%m-%d')}, Symbol={symbol}, Type={trade_type}, Quantity={quantity:.4f}, Price={price:.2f}")
 
-        # Fetch asset_id for the symbol. This is a simplification; in a real system,
-        # assets would be pre-loaded or fetched more robustly.
-        asset = await models.Asset.find_one(models.Asset.symbol == symbol)
-        if not asset:
-            # Create a dummy asset for backtesting if it doesn't exist
-            asset = models.Asset(symbol=symbol, name=symbol, asset_type="stock_us") # Default to stock_us
-            await asset.insert()
-            if self.debug:
-                self.debug_logs.append(f"[DEBUG] Created dummy asset for {symbol} in backtest.")
+        asset = await self._get_asset(symbol)
 
         if trade_type == 'buy':
             slippage_cost = price * self.slippage_pct
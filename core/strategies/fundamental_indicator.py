@@ -50,8 +50,7 @@ class FundamentalIndicatorStrategy(BaseStrategy):
 
         # 2. Screen assets
         qualified_assets = []
-        for _, row in universe_df.iterrows():
-            symbol = row['Code'] # Assuming 'Code' column for symbol
+        for symbol in universe_df['Code'].to_numpy(): # Assuming 'Code' column for symbol
             fundamental_data = data_context.get_fundamental_data(symbol, date)
             if not fundamental_data:
                 continue
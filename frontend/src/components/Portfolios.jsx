@@ -67,7 +67,7 @@ function Portfolios() {
 
     const fetchPortfolios = useCallback(async () => {
         try {
-            const data = await fetchApi('/api/portfolios/');
+            const data = await fetchApi('/api/portfolios/?expand=strategy');
             setPortfolios(data);
         } catch (error) {
             console.error("Error fetching portfolios:", error);
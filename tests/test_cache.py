@@ -0,0 +1,226 @@
+import sys
+import os
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from starlette.requests import Request
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가합니다.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    # Every test gets its own empty cache directory
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _daily_frame(start_date: str, end_date: str) -> pd.DataFrame:
+    index = pd.date_range(start_date, end_date, freq='D')
+    return pd.DataFrame({'Close': np.arange(len(index), dtype=float) + index.day}, index=index)
+
+
+def _set_clock(monkeypatch, when: datetime):
+    monkeypatch.setattr(cache.time, "time", lambda: when.timestamp())
+
+
+# --- disk_cache_timeseries ---
+
+def test_timeseries_serves_inner_range_and_merges_outer_range():
+    calls = []
+
+    @cache.disk_cache_timeseries("test_ts")
+    def fetch(symbol, start_date, end_date):
+        calls.append((symbol, start_date, end_date))
+        return _daily_frame(start_date, end_date)
+
+    first = fetch("AAA", "2020-01-10", "2020-01-20")
+    assert calls == [("AAA", "2020-01-10", "2020-01-20")]
+    assert first.index.min() == pd.Timestamp("2020-01-10") and first.index.max() == pd.Timestamp("2020-01-20")
+
+    inner = fetch("AAA", "2020-01-12", "2020-01-15")
+    assert len(calls) == 1  # answered by slicing the cached frame
+    pd.testing.assert_frame_equal(inner, first.loc["2020-01-12":"2020-01-15"])
+
+    outer = fetch("AAA", "2020-01-05", "2020-01-25")
+    assert calls[-1] == ("AAA", "2020-01-05", "2020-01-25")  # union of the cached and the requested range
+    assert outer.index.min() == pd.Timestamp("2020-01-05") and outer.index.max() == pd.Timestamp("2020-01-25")
+
+    fetch("AAA", "2020-01-01", "2020-01-08")
+    assert calls[-1] == ("AAA", "2020-01-01", "2020-01-25")
+
+    fetch("BBB", "2020-01-12", "2020-01-15")
+    assert calls[-1] == ("BBB", "2020-01-12", "2020-01-15")  # entries are per symbol
+
+
+def test_timeseries_settled_history_outlives_ttl(monkeypatch):
+    calls = []
+
+    @cache.disk_cache_timeseries("test_ttl", ttl_seconds=60 * 60)
+    def fetch(symbol, start_date, end_date):
+        calls.append((start_date, end_date))
+        return _daily_frame(start_date, end_date)
+
+    _set_clock(monkeypatch, datetime(2020, 1, 21, 12))
+    fetch("AAA", "2020-01-01", "2020-01-20")
+    assert len(calls) == 1
+
+    # Two days later the TTL has long passed
+    _set_clock(monkeypatch, datetime(2020, 1, 23, 12))
+    fetch("AAA", "2020-01-05", "2020-01-18")
+    assert len(calls) == 1  # ends before the day before the fetch: settled, never expires
+
+    fetch("AAA", "2020-01-05", "2020-01-20")
+    assert len(calls) == 2  # reaches the day before the fetch: subject to the TTL, so refetched
+
+
+def test_timeseries_does_not_cache_empty_results():
+    calls = []
+
+    @cache.disk_cache_timeseries("test_empty")
+    def fetch(symbol, start_date, end_date):
+        calls.append(symbol)
+        return pd.DataFrame()
+
+    assert fetch("AAA", "2020-01-01", "2020-01-10").empty
+    assert fetch("AAA", "2020-01-01", "2020-01-10").empty
+    assert len(calls) == 2
+
+
+# --- parquet_series_cache ---
+
+def test_parquet_series_fetches_only_the_tail(cache_dir):
+    calls = []
+
+    @cache.parquet_series_cache("test_series", ttl_seconds=-1)  # always stale
+    def fetch(start_date, end_date):
+        calls.append((start_date, end_date))
+        return _daily_frame(start_date, end_date)
+
+    fetch("2020-01-01", "2020-01-10")
+    assert calls == [("2020-01-01", "2020-01-10")]
+    assert (cache_dir / "test_series.parquet").exists()
+
+    result = fetch("2020-01-01", "2020-01-15")
+    assert calls[-1] == ("2020-01-10", "2020-01-15")  # from the last cached row on
+    assert result.index.min() == pd.Timestamp("2020-01-01") and result.index.max() == pd.Timestamp("2020-01-15")
+
+    fetch("2019-12-25", "2020-01-05")
+    assert calls[-1] == ("2019-12-25", "2020-01-15")  # before the first row: the union is refetched
+
+
+def test_parquet_series_forward_fills_on_combine():
+    @cache.parquet_series_cache("test_ffill", ttl_seconds=-1)
+    def fetch(start_date, end_date):
+        frame = _daily_frame(start_date, end_date)
+        frame.loc[frame.index > pd.Timestamp("2020-01-11"), 'Close'] = np.nan  # not published yet
+        return frame
+
+    fetch("2020-01-01", "2020-01-10")
+    result = fetch("2020-01-01", "2020-01-13")
+    assert not result['Close'].isna().any()
+    assert result.loc["2020-01-13", 'Close'] == result.loc["2020-01-11", 'Close']
+
+
+def test_parquet_series_fresh_file_answers_past_last_row():
+    calls = []
+
+    @cache.parquet_series_cache("test_fresh", ttl_seconds=60 * 60)
+    def fetch(start_date, end_date):
+        calls.append((start_date, end_date))
+        return _daily_frame(start_date, "2020-01-10")  # provider lags behind end_date
+
+    fetch("2020-01-01", "2020-01-10")
+    result = fetch("2020-01-01", "2020-01-15")
+    assert len(calls) == 1
+    assert result.index.max() == pd.Timestamp("2020-01-10")
+
+
+# --- memory_cache ---
+
+def test_memory_cache_evicts_oldest_entry():
+    calls = []
+
+    @cache.memory_cache(ttl_seconds=60, maxsize=2)
+    def square(x):
+        calls.append(x)
+        return {"value": x * x}
+
+    square(1)
+    square(2)
+    square(1)
+    assert calls == [1, 2]
+
+    square(3)  # evicts 1, the oldest entry
+    square(2)
+    assert calls == [1, 2, 3]
+    square(1)
+    assert calls == [1, 2, 3, 1]
+
+
+def test_memory_cache_skips_empty_and_expired_results():
+    calls = []
+
+    @cache.memory_cache(ttl_seconds=-1)
+    def expired(x):
+        calls.append(x)
+        return {"value": x}
+
+    expired(1)
+    expired(1)
+    assert calls == [1, 1]
+
+    @cache.memory_cache(ttl_seconds=60)
+    def empty(x):
+        calls.append(x)
+        return {}
+
+    empty(2)
+    empty(2)
+    assert calls == [1, 1, 2, 2]
+
+
+def test_memory_cache_wraps_coroutines():
+    calls = []
+
+    @cache.memory_cache(ttl_seconds=60)
+    async def payload(x):
+        calls.append(x)
+        return {"value": x}
+
+    async def run():
+        return [await payload(1), await payload(1)]
+
+    assert asyncio.run(run()) == [{"value": 1}, {"value": 1}]
+    assert calls == [1]
+
+
+# --- etag_response ---
+
+def _request(headers=None) -> Request:
+    raw_headers = [(name.encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw_headers})
+
+
+def test_etag_response_returns_304_for_matching_etag():
+    payload = {"2020-01-01": {"DGS1": 0.01}}
+
+    first = cache.etag_response(_request(), payload, max_age=60)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, max-age=60"
+
+    cached = cache.etag_response(_request({"if-none-match": etag}), payload, max_age=60)
+    assert cached.status_code == 304
+    assert cached.body == b""
+    assert cached.headers["etag"] == etag
+
+    changed = cache.etag_response(_request({"if-none-match": etag}), {"2020-01-02": {"DGS1": 0.02}}, max_age=60)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
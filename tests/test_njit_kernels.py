@@ -0,0 +1,57 @@
+import sys
+import os
+import importlib.util
+
+import numpy as np
+import pytest
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가합니다.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import portfolio_calculator
+
+
+def _load_archived_engine():
+    # The archived engine uses backend-relative imports (.models, ._njit, ...), so load it as a backend module
+    path = os.path.join(os.path.dirname(__file__), '..', 'archive', 'backtesting_engine.py')
+    spec = importlib.util.spec_from_file_location("backend.backtesting_engine", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+backtesting_engine = _load_archived_engine()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_daily_portfolio_value_matches_vectorized_twin(seed):
+    rng = np.random.default_rng(seed)
+    n_days, n_assets = 60, 8
+    quantity_changes = np.where(rng.random((n_days, n_assets)) < 0.2, rng.normal(0, 10, (n_days, n_assets)), 0.0)
+    prices = rng.uniform(1, 1000, (n_days, n_assets))
+    prices[rng.random((n_days, n_assets)) < 0.1] = np.nan  # missing prices contribute nothing
+
+    np.testing.assert_allclose(
+        portfolio_calculator._daily_portfolio_value(quantity_changes, prices),
+        portfolio_calculator._daily_portfolio_value_np(quantity_changes, prices),
+        rtol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_equal_weight_trades_matches_vectorized_twin(seed):
+    rng = np.random.default_rng(seed)
+    n = 40
+    prices = rng.uniform(1, 100000, n)
+    prices[rng.random(n) < 0.15] = 0.0  # no usable price
+    holdings = np.where(rng.random(n) < 0.5, rng.integers(0, 500, n), 0).astype(float)
+    is_target = rng.random(n) < 0.5
+    min_qty = rng.choice([0.0, 1.0, 0.001], n)
+    target_value_per_asset = float(rng.uniform(1e5, 1e7))
+
+    quantities, status = backtesting_engine._equal_weight_trades(prices, holdings, is_target, min_qty, target_value_per_asset)
+    quantities_np, status_np = backtesting_engine._equal_weight_trades_np(prices, holdings, is_target, min_qty, target_value_per_asset)
+
+    np.testing.assert_array_equal(status, status_np)
+    np.testing.assert_allclose(quantities, quantities_np, rtol=1e-12)
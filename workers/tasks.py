@@ -70,8 +70,11 @@ def run_backtest_task(
             strategy_params = strategy_doc.parameters.model_dump() if strategy_doc.parameters else {}
 
             # 1. Create a Virtual Portfolio and a placeholder BacktestResult
+            # Portfolio names are unique; the id's counter bytes keep same-minute runs of a strategy apart
+            portfolio_id = PydanticObjectId()
             virtual_portfolio = models.Portfolio(
-                name=f"VP: {strategy_doc.name[:25]} ({datetime.now().strftime('%m/%d %H:%M')})",
+                id=portfolio_id,
+                name=f"VP: {strategy_doc.name[:25]} ({datetime.now().strftime('%m/%d %H:%M')}) {str(portfolio_id)[-6:]}",
                 environment="backtest"
             )
             await virtual_portfolio.insert()
@@ -80,8 +83,8 @@ def run_backtest_task(
                 name=f"Auto-saved backtest for {strategy_doc.name} on {datetime.now().strftime('%Y-%m-%d %H:%M')}",
                 strategy=strategy_doc,
                 virtual_portfolio_id=virtual_portfolio.id,
-                start_date=datetime.strptime(start_date, "%Y-%m-%d"),
-                end_date=datetime.strptime(end_date, "%Y-%m-%d"),
+                start_date=datetime.fromisoformat(start_date),
+                end_date=datetime.fromisoformat(end_date),
                 initial_capital=initial_capital,
                 status="RUNNING",
                 debug_logs=[],
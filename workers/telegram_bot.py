@@ -61,26 +61,32 @@ async def portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
             msg = f"📂 **포트폴리오: {pf.name}**\n"
             msg += f"환경: {'실전' if pf.environment == 'live' else '백테스트'}\n"
             
-            transactions = await models.Transaction.find(models.Transaction.portfolio_id == pf.id).to_list()
-            holdings_data = portfolio_calculator.calculate_current_holdings(transactions)
+            holdings_data, asset_map = await portfolio_calculator.aggregate_current_holdings(pf.id)
 
             if not holdings_data:
                 msg += "보유 중인 자산이 없습니다.\n"
                 await update.message.reply_text(msg, parse_mode=ParseMode.MARKDOWN)
                 continue
 
-            asset_ids = list(holdings_data.keys())
-            assets = await models.Asset.find({"_id": {"$in": asset_ids}}).to_list()
-            asset_map = {a.id: a for a in assets}
-
             total_portfolio_value = 0.0
             total_invested_amount = 0.0
             
             # Prepare data for message
             holdings_list = []
             
-            end_date = datetime.now().strftime('%Y-%m-%d')
-            start_date = (datetime.now() - timedelta(days=5)).strftime('%Y-%m-%d')
+            # One clock read for both ends of the price lookup window
+            now = datetime.now()
+            end_date = now.strftime('%Y-%m-%d')
+            start_date = (now - timedelta(days=5)).strftime('%Y-%m-%d')
+
+            # get_stock_data blocks on the network; fetch every holding's price in worker threads at once
+            # so the bot's event loop keeps serving other chats
+            held_ids = [asset_id for asset_id in holdings_data if asset_id in asset_map]
+            price_dfs = await asyncio.gather(
+                *(asyncio.to_thread(data_collector.get_stock_data, asset_map[asset_id].symbol, start_date, end_date) for asset_id in held_ids),
+                return_exceptions=True,
+            )
+            price_df_by_id = dict(zip(held_ids, price_dfs))
 
             for asset_id, data in holdings_data.items():
                 asset = asset_map.get(asset_id)
@@ -93,12 +99,11 @@ async def portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 avg_price = data['average_price']
                 
                 current_price = avg_price # Fallback
-                try:
-                    df = data_collector.get_stock_data(symbol, start_date, end_date)
-                    if not df.empty:
-                        current_price = float(df['Close'].iloc[-1])
-                except Exception as e:
-                    logger.error(f"Error fetching price for {symbol}: {e}")
+                df = price_df_by_id[asset_id]
+                if isinstance(df, Exception):
+                    logger.error(f"Error fetching price for {symbol}: {df}")
+                elif not df.empty:
+                    current_price = float(df['Close'].iloc[-1])
 
                 current_value = quantity * current_price
                 invested_amount = quantity * avg_price